@@ -4,12 +4,29 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-import yfinance as yf
 from datetime import datetime, timedelta
+import os
 import time
 import warnings
 warnings.filterwarnings('ignore')
 
+from alerts import check_quotes, render_alert_panel, session_alert_engine
+from currencies import load_registry
+from history import price_matrix
+from rolling_stats import cached_statistics, card_statistics, statistics_caption
+from shared_history import attach_shared_history
+from simulation import render_cost_inputs, simulate_trade, STATUT_STOP_LOSS, STATUT_TAKE_PROFIT
+import market_data
+
+# Historique publié par un processus chargeur (voir shared_history.py)
+SHARED_HISTORY_PATH = os.environ.get('FOREX_SHARED_HISTORY')
+
+# Rafraîchissement automatique des cotations (secondes, 0 = désactivé)
+AUTO_REFRESH_SECONDS = float(os.environ.get('FOREX_AUTO_REFRESH', 60))
+
+# Granularités de l'historique (libellé -> intervalle Yahoo)
+GRANULARITES = {'1 jour': '1d', '1 heure': '1h', '5 minutes': '5m', '1 minute': '1m'}
+
 # Configuration de la page
 st.set_page_config(
     page_title="Dashboard Devises Euro - Temps Réel",
@@ -38,36 +55,49 @@ st.markdown("""
 
 class YFinanceEuroForexDashboard:
     def __init__(self):
+        self.registry = load_registry()
         self.currencies = self.define_currencies()
+        self.alert_engine = session_alert_engine(self.registry)
         self.historical_data = pd.DataFrame()
+        self.shared_history = None
+        self.history_store = None
+        self.statistics = None
+        self.interval = GRANULARITES[st.session_state.get('granularite', '1 jour')]
         self.current_data = pd.DataFrame()
         self.last_update_time = None
         self.fetch_all_data() # Récupérer les données au démarrage
 
     def define_currencies(self):
         """Définit les paires de devises avec l'Euro et leur ticker yfinance."""
-        return {
-            'EUR/USD': {'nom': 'Euro / Dollar Américain', 'icone': '🇪🇺🇺🇸', 'yfinance_ticker': 'EURUSD=X'},
-            'EUR/GBP': {'nom': 'Euro / Livre Sterling', 'icone': '🇪🇺🇬🇧', 'yfinance_ticker': 'EURGBP=X'},
-            'EUR/JPY': {'nom': 'Euro / Yen Japonais', 'icone': '🇪🇺🇯🇵', 'yfinance_ticker': 'EURJPY=X'},
-            'EUR/CHF': {'nom': 'Euro / Franc Suisse', 'icone': '🇪🇺🇨🇭', 'yfinance_ticker': 'EURCHF=X'},
-            'EUR/AUD': {'nom': 'Euro / Dollar Australien', 'icone': '🇪🇺🇦🇺', 'yfinance_ticker': 'EURAUD=X'},
-            'EUR/CAD': {'nom': 'Euro / Dollar Canadien', 'icone': '🇪🇺🇨🇦', 'yfinance_ticker': 'EURCAD=X'},
-        }
-
-    def fetch_all_data(self):
-        """Récupère les données historiques et actuelles via yfinance."""
+        return self.registry.as_dict()
+
+    def fetch_all_data(self, force=False):
+        """Récupère les données historiques et actuelles depuis Yahoo Finance.
+
+        Les données viennent du cache partagé du processus ; ``force`` demande un
+        rafraîchissement, limité par l'intervalle minimal de chaque type de donnée.
+        """
         all_historical_data = []
         current_rates_data = []
         
         tickers = [info['yfinance_ticker'] for info in self.currencies.values()]
         
         try:
-            # Récupérer les données historiques (2 ans) pour le graphique et le simulateur
-            hist_data = yf.download(tickers, period="2y", interval="1d")['Close']
+            # Récupérer les données historiques (2 ans) pour le graphique et le simulateur,
+            # sauf si elles sont publiées en mémoire partagée par le processus chargeur
+            # L'historique intraday est conservé au format compact (voir history.CompactHistory)
+            if self.interval != '1d':
+                self.history_store, hist_updated_at = market_data.intraday_history(self.registry, self.interval, force=force)
+                hist_data = pd.DataFrame()
+            elif SHARED_HISTORY_PATH and self.attach_shared_history() is not None:
+                hist_data = pd.DataFrame()
+                hist_updated_at = self.shared_history.version
+            else:
+                hist_data, hist_updated_at = market_data.history(tickers, period="2y", interval="1d", force=force)
+            self.statistics = self.initialize_statistics(hist_data, hist_updated_at)
             
             # Récupérer les données actuelles
-            tickers_obj = yf.Tickers(tickers)
+            quotes, updated_at = market_data.quotes(tickers, force=force)
             
             for symbol, info in self.currencies.items():
                 ticker = info['yfinance_ticker']
@@ -81,8 +111,8 @@ class YFinanceEuroForexDashboard:
                     all_historical_data.append(df_hist)
                 
                 # Données actuelles
-                current_price = tickers_obj.tickers[ticker].info.get('regularMarketPrice')
-                previous_close = tickers_obj.tickers[ticker].info.get('previousClose')
+                current_price = quotes[ticker]['regularMarketPrice']
+                previous_close = quotes[ticker]['previousClose']
                 
                 if current_price and previous_close:
                     change_pct = ((current_price - previous_close) / previous_close) * 100
@@ -103,22 +133,77 @@ class YFinanceEuroForexDashboard:
             if current_rates_data:
                 self.current_data = pd.DataFrame(current_rates_data)
             
-            self.last_update_time = datetime.now().strftime('%H:%M:%S')
+            self.last_update_time = updated_at.strftime('%H:%M:%S')
+            # Heure de récupération : une cotation resservie par le cache n'est pas réévaluée
+            check_quotes(self.alert_engine, self.registry, self.current_data, int(updated_at.timestamp() * 1e9))
 
         except Exception as e:
-            st.error(f"Erreur lors de la récupération des données depuis yfinance: {e}")
+            st.error(f"Erreur lors de la récupération des données depuis Yahoo Finance: {e}")
             st.warning("Veuillez vérifier votre connexion internet ou réessayer plus tard.")
 
+    def attach_shared_history(self):
+        """Historique publié en mémoire partagée, ou None (téléchargement Yahoo) s'il n'est pas lisible."""
+        try:
+            self.shared_history = attach_shared_history(SHARED_HISTORY_PATH).current()
+        except (OSError, ValueError) as e:
+            st.error(f"Historique partagé indisponible ({e}) : historique téléchargé depuis Yahoo Finance.")
+            self.shared_history = None
+        return self.shared_history
+
+    def initialize_statistics(self, hist_data, version):
+        """Statistiques glissantes journalières par paire, servies par le cache partagé (voir rolling_stats.py).
+
+        Elles ne sont recalculées (de façon incrémentale) que lorsque l'historique a été rafraîchi.
+        """
+        if self.history_store is not None:
+            key = ('intraday', self.interval)
+
+            def load():
+                # Clôtures journalières reconstituées à partir des barres intraday
+                daily = self.history_store.frame()
+                daily['Date'] = daily['Date'].dt.normalize()
+                dates, _, prix = price_matrix(daily, self.registry)
+                return dates, prix
+        elif self.shared_history is not None:
+            key = ('partage', SHARED_HISTORY_PATH)
+            history = self.shared_history
+
+            def load():
+                return history.dates, history.matrix(self.registry.symboles)
+        else:
+            key = ('yahoo', tuple(self.registry.tickers))
+
+            def load():
+                wide = hist_data.reindex(columns=self.registry.tickers).ffill()
+                return wide.index.to_numpy(), wide.to_numpy(dtype=np.float64)
+        return cached_statistics(key, load, self.registry, version=version)
+
+    def has_history(self):
+        """Indique si des données historiques sont disponibles."""
+        if self.history_store is not None:
+            return len(self.history_store) > 0
+        if self.shared_history is not None:
+            return len(self.shared_history.dates) > 0
+        return not self.historical_data.empty and 'Date' in self.historical_data.columns
+
+    def get_history(self, symboles):
+        """Historique des paires demandées (local, intraday ou partagé)."""
+        if self.history_store is not None:
+            return self.history_store.frame(symboles, date_col='Date')
+        if self.shared_history is not None:
+            return self.shared_history.frame(symboles, date_col='Date')
+        return self.historical_data[self.historical_data['symbole'].isin(symboles)]
+
     def update_live_data(self):
         """Met à jour uniquement les données actuelles pour un rafraîchissement rapide."""
         current_rates_data = []
         tickers = [info['yfinance_ticker'] for info in self.currencies.values()]
         try:
-            tickers_obj = yf.Tickers(tickers)
+            quotes, updated_at = market_data.quotes(tickers, force=True)
             for symbol, info in self.currencies.items():
                 ticker = info['yfinance_ticker']
-                current_price = tickers_obj.tickers[ticker].info.get('regularMarketPrice')
-                previous_close = tickers_obj.tickers[ticker].info.get('previousClose')
+                current_price = quotes[ticker]['regularMarketPrice']
+                previous_close = quotes[ticker]['previousClose']
                 if current_price and previous_close:
                     change_pct = ((current_price - previous_close) / previous_close) * 100
                     current_rates_data.append({
@@ -127,7 +212,8 @@ class YFinanceEuroForexDashboard:
                     })
             if current_rates_data:
                 self.current_data = pd.DataFrame(current_rates_data)
-            self.last_update_time = datetime.now().strftime('%H:%M:%S')
+            self.last_update_time = updated_at.strftime('%H:%M:%S')
+            check_quotes(self.alert_engine, self.registry, self.current_data, int(updated_at.timestamp() * 1e9))
         except Exception as e:
             st.sidebar.error(f"Erreur de mise à jour: {e}")
 
@@ -160,17 +246,29 @@ class YFinanceEuroForexDashboard:
                             </div>
                             <div class="currency-value">{currency['prix']:.5f}</div>
                             <div class="currency-change {change_class}">{currency['change_pct']:+.2f}%</div>
+                            {self.format_card_statistics(currency['symbole'])}
                         </div>
                         """, unsafe_allow_html=True)
         else:
             st.warning("Chargement des données...")
 
+    def format_card_statistics(self, symbole):
+        """Volatilité réalisée, mouvement moyen et drawdown affichés sur la carte d'une paire."""
+        if self.statistics is None:
+            return ""
+        stats = self.statistics.loc[symbole]
+        return (
+            '<div style="margin-top: 1rem; font-size: 0.8rem;">'
+            f"{card_statistics(stats, stats['vol_20'])}"
+            '</div>'
+        )
+
     def create_price_overview(self):
         """Crée la vue d'ensemble des prix avec de vraies données historiques."""
         st.markdown('<h3 class="section-header">📈 ANALYSE DES TAUX HISTORIQUES</h3>', unsafe_allow_html=True)
         
         # --- CORRECTION ICI ---
-        if self.historical_data.empty or 'Date' not in self.historical_data.columns:
+        if not self.has_history():
             st.warning("Les données historiques ne sont pas encore chargées ou sont corrompues. Veuillez mettre à jour les données.")
             return
 
@@ -190,7 +288,7 @@ class YFinanceEuroForexDashboard:
                 index=3
             )
         
-        filtered_data = self.historical_data[self.historical_data['symbole'].isin(selected_currencies)]
+        filtered_data = self.get_history(selected_currencies)
         
         if period != '2 ans':
             if 'mois' in period:
@@ -207,6 +305,12 @@ class YFinanceEuroForexDashboard:
         fig.update_layout(yaxis_title="Taux de Change")
         st.plotly_chart(fig, width='stretch')
 
+    def realized_volatility(self, symbole):
+        """Volatilité journalière réalisée sur 20 jours (celle de la configuration à défaut)."""
+        if self.statistics is not None and np.isfinite(self.statistics.loc[symbole, 'vol_20']):
+            return self.statistics.loc[symbole, 'vol_20']
+        return self.registry.info(symbole)['volatilite']
+
     def create_trading_simulator(self):
         """Crée un simulateur de trading basé sur de vraies données historiques."""
         st.markdown('<h3 class="section-header">💹 SIMULATEUR DE TRADING HISTORIQUE</h3>', unsafe_allow_html=True)
@@ -218,7 +322,7 @@ class YFinanceEuroForexDashboard:
         """, unsafe_allow_html=True)
 
         # --- CORRECTION ICI ---
-        if self.historical_data.empty or 'Date' not in self.historical_data.columns:
+        if not self.has_history():
             st.warning("Les données historiques ne sont pas encore disponibles ou sont corrompues. Veuillez mettre à jour les données.")
             return
 
@@ -229,9 +333,11 @@ class YFinanceEuroForexDashboard:
             position_type = st.radio("Type de position:", ["Achat (Long)", "Vente (Short)"], horizontal=True)
             investment_amount = st.number_input("Montant de l'investissement (€):", min_value=100, max_value=100000, value=1000, step=100)
             leverage = st.slider("Effet de levier:", min_value=1, max_value=30, value=10, step=1)
+            if self.statistics is not None:
+                st.caption(statistics_caption(self.statistics.loc[selected_pair]))
         
         with col2:
-            pair_data = self.historical_data[self.historical_data['symbole'] == selected_pair]
+            pair_data = self.get_history([selected_pair])
             # --- CORRECTION ICI ---
             if pair_data.empty or 'Date' not in pair_data.columns:
                 st.error(f"Aucune donnée historique trouvée ou corrompue pour la paire {selected_pair}. Essayez de mettre à jour les données.")
@@ -250,49 +356,33 @@ class YFinanceEuroForexDashboard:
             with col2b:
                 take_profit_pct = st.number_input("Take Profit (%):", min_value=0.1, max_value=20.0, value=5.0, step=0.1)
         
+        costs = render_cost_inputs(self.registry.spread_pips[self.registry.id_of(selected_pair)],
+                                   self.realized_volatility(selected_pair))
+        
         if st.button("Lancer la simulation", type="primary"):
             # --- CORRECTION ICI ---
-            filtered_pair_data = pair_data[(pair_data['Date'] >= pd.to_datetime(entry_date)) & (pair_data['Date'] <= pd.to_datetime(exit_date))].reset_index(drop=True)
+            filtered_pair_data = pair_data[(pair_data['Date'] >= pd.to_datetime(entry_date)) & (pair_data['Date'] < pd.to_datetime(exit_date) + pd.Timedelta(days=1))].reset_index(drop=True)
             
             if len(filtered_pair_data) > 1:
                 entry_price = filtered_pair_data.iloc[0]['prix']
-                exit_price = filtered_pair_data.iloc[-1]['prix']
                 
                 # Simulation Stop Loss / Take Profit
-                stop_loss_triggered = False
-                take_profit_triggered = False
-                
-                for i in range(1, len(filtered_pair_data)):
-                    current_price = filtered_pair_data.iloc[i]['prix']
-                    if position_type == "Achat (Long)":
-                        if current_price <= entry_price * (1 - stop_loss_pct/100):
-                            stop_loss_triggered = True
-                            exit_price = current_price
-                            break
-                        if current_price >= entry_price * (1 + take_profit_pct/100):
-                            take_profit_triggered = True
-                            exit_price = current_price
-                            break
-                    else: # Vente (Short)
-                        if current_price >= entry_price * (1 + stop_loss_pct/100):
-                            stop_loss_triggered = True
-                            exit_price = current_price
-                            break
-                        if current_price <= entry_price * (1 - take_profit_pct/100):
-                            take_profit_triggered = True
-                            exit_price = current_price
-                            break
+                result = simulate_trade(
+                    filtered_pair_data['prix'].to_numpy(),
+                    position_type == "Achat (Long)",
+                    stop_loss_pct, take_profit_pct, leverage, investment_amount,
+                    self.registry.pip_size[self.registry.id_of(selected_pair)],
+                    costs=costs, dates=filtered_pair_data['Date'].to_numpy()
+                )
+                exit_price = result['exit_price']
+                stop_loss_triggered = result['statut'] == STATUT_STOP_LOSS
+                take_profit_triggered = result['statut'] == STATUT_TAKE_PROFIT
                 
                 # Calculs finaux
-                pip_change = (exit_price - entry_price) / (0.0001 if 'JPY' not in selected_pair else 0.01)
-                if position_type == "Achat (Long)":
-                    price_change_pct = ((exit_price - entry_price) / entry_price) * 100
-                else:
-                    price_change_pct = ((entry_price - exit_price) / entry_price) * 100
-                
-                leveraged_investment = investment_amount * leverage
-                profit_loss = leveraged_investment * (price_change_pct / 100)
-                roi = (profit_loss / investment_amount) * 100
+                pip_change = result['pip_change']
+                price_change_pct = result['price_change_pct']
+                profit_loss = result['profit_loss']
+                roi = result['roi']
                 
                 # Affichage des résultats
                 st.markdown("### Résultats de la simulation")
@@ -308,6 +398,7 @@ class YFinanceEuroForexDashboard:
                     <h3>Gain/Perte: {profit_loss_symbol}€{profit_loss:.2f}</h3>
                     <p>ROI: {profit_loss_symbol}{roi:.2f}%</p>
                     <p>Investissement: €{investment_amount:.2f} (Levier: {leverage}x)</p>
+                    <p>Frais: €{result['costs']:.2f} (spread €{result['cost_spread']:.2f}, commission €{result['cost_commission']:.2f}, swap €{result['cost_swap']:.2f}, slippage €{result['cost_slippage']:.2f})</p>
                 </div>
                 """, unsafe_allow_html=True)
                 
@@ -321,7 +412,7 @@ class YFinanceEuroForexDashboard:
                 # --- CORRECTION ICI ---
                 fig.add_trace(go.Scatter(x=[filtered_pair_data.iloc[0]['Date']], y=[entry_price], mode='markers', name='Entrée', marker=dict(color='green', size=10)))
                 # --- CORRECTION ICI ---
-                fig.add_trace(go.Scatter(x=[filtered_pair_data.iloc[-1]['Date'] if not (stop_loss_triggered or take_profit_triggered) else filtered_pair_data.iloc[min(i, len(filtered_pair_data)-1)]['Date']], y=[exit_price], mode='markers', name='Sortie', marker=dict(color='red', size=10)))
+                fig.add_trace(go.Scatter(x=[filtered_pair_data.iloc[result['exit_idx']]['Date']], y=[exit_price], mode='markers', name='Sortie', marker=dict(color='red', size=10)))
                 
                 if position_type == "Achat (Long)":
                     fig.add_hline(y=entry_price * (1 - stop_loss_pct/100), line_dash="dash", line_color="red", annotation_text="Stop Loss")
@@ -339,6 +430,7 @@ class YFinanceEuroForexDashboard:
         """Exécute le dashboard."""
         self.display_header()
         
+        st.sidebar.selectbox("Granularité de l'historique", list(GRANULARITES), key='granularite')
         menu = st.sidebar.selectbox("Navigation", ["Vue d'ensemble", "Analyse des prix", "Simulateur de trading"])
         
         if menu == "Vue d'ensemble":
@@ -348,16 +440,19 @@ class YFinanceEuroForexDashboard:
         elif menu == "Simulateur de trading":
             self.create_trading_simulator()
         
+        render_alert_panel(self.alert_engine, self.registry, self.current_data)
+        
         # Bouton de mise à jour manuel
         if st.sidebar.button("🔄 Mettre à jour les données", type="primary"):
             with st.spinner('Récupération des données...'):
-                self.fetch_all_data()
+                self.fetch_all_data(force=True)
                 st.rerun()
         
-        # Auto-refresh toutes les 60 secondes pour les données actuelles
-        time.sleep(60)
-        self.update_live_data()
-        st.rerun()
+        # Auto-refresh périodique des données actuelles
+        if AUTO_REFRESH_SECONDS > 0:
+            time.sleep(AUTO_REFRESH_SECONDS)
+            self.update_live_data()
+            st.rerun()
 
 # Lancement du dashboard
 if __name__ == "__main__":
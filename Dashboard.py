@@ -6,11 +6,34 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from datetime import datetime, timedelta
+import os
 import time
-import random
 import warnings
 warnings.filterwarnings('ignore')
 
+from alerts import check_quotes, render_alert_panel, session_alert_engine
+from currencies import load_registry
+from history import generate_synthetic_history, price_matrix
+from rolling_stats import cached_statistics, card_statistics, statistics_caption
+from shared_history import attach_shared_history
+from simulation import render_cost_inputs, simulate_trade, STATUT_STOP_LOSS, STATUT_TAKE_PROFIT
+from snapshot import load_snapshot, load_snapshot_file, save_snapshot
+from tick_simulator import TickSimulator, cached_covariance, shared_feed
+
+# Historique publié par un processus chargeur (voir shared_history.py)
+SHARED_HISTORY_PATH = os.environ.get('FOREX_SHARED_HISTORY')
+
+# Instantané de l'état du dashboard, restauré au démarrage s'il existe (voir snapshot.py)
+SNAPSHOT_PATH = os.environ.get('FOREX_SNAPSHOT', 'dashboard_snapshot.npz')
+# Colonnes des cotations conservées d'une exécution à l'autre et dans l'instantané
+LIVE_COLUMNS = ['prix', 'bid', 'ask', 'change_pct', 'spread', 'volume_journalier']
+
+# Flux de ticks continu (ticks/seconde, 0 = ticks générés à chaque mise à jour)
+TICK_RATE = float(os.environ.get('FOREX_TICK_RATE', 0))
+# Mise à jour manuelle : 60 pas d'une minute de marché
+LIVE_UPDATE_STEPS = 60
+LIVE_STEP_SECONDS = 60.0
+
 # Configuration de la page
 st.set_page_config(
     page_title="Dashboard Devises Euro - Marché des Changes",
@@ -95,162 +118,201 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+def read_snapshot_bytes():
+    """Contenu de l'instantané enregistré, pour l'export"""
+    with open(SNAPSHOT_PATH, 'rb') as f:
+        return f.read()
+
+
 class EuroForexDashboard:
     def __init__(self):
+        self.registry = load_registry()
         self.currencies = self.define_currencies()
+        self.alert_engine = session_alert_engine(self.registry)
+        self.state = self.initialize_state()
+        self.rng = np.random.default_rng(self.state['seed'])
+        if self.state['rng_state'] is not None:
+            self.rng.bit_generator.state = self.state['rng_state']
+        self.shared_history = (
+            self.attach_shared_history() if SHARED_HISTORY_PATH and self.state['history'] is None else None
+        )
         self.historical_data = self.initialize_historical_data()
+        self.statistics = self.initialize_statistics()
         self.current_data = self.initialize_current_data()
+        self.tick_simulator = self.initialize_tick_simulator()
+        if self.tick_simulator is None:
+            self.update_live_data()
+        self.save_live_state()
         
     def define_currencies(self):
         """Définit les paires de devises majeures avec l'Euro"""
+        return self.registry.as_dict()
+    
+    def initialize_state(self):
+        """État de la session (graine, cotations, simulations), restauré depuis l'instantané s'il existe"""
+        if 'dashboard_state' not in st.session_state:
+            if os.path.exists(SNAPSHOT_PATH):
+                state = self.state_from_snapshot(*load_snapshot_file(SNAPSHOT_PATH))
+            else:
+                seed = os.environ.get('FOREX_SEED')
+                state = {
+                    'seed': int(seed) if seed else int(np.random.default_rng().integers(2**32)),
+                    'rng_state': None, 'clock_ns': None, 'history': None, 'live': None, 'simulations': [],
+                }
+                state['history_key'] = ('synthetique', state['seed'])
+            st.session_state['dashboard_state'] = state
+        return st.session_state['dashboard_state']
+
+    @staticmethod
+    def state_from_snapshot(meta, tables):
+        """État de session décrit par un instantané"""
         return {
-            'EUR/USD': {
-                'nom': 'Euro / Dollar Américain',
-                'symbole': 'EUR/USD',
-                'icone': '🇪🇺🇺🇸',
-                'categorie': 'Majeures',
-                'unite': 'taux de change',
-                'prix_base': 1.0850,
-                'volatilite': 1.2,
-                'volume_journalier': 750.0,
-                'pays': ['Zone Euro', 'États-Unis'],
-                'banque_centrale': ['BCE', 'Fed'],
-                'description': 'La paire de devises la plus échangée au monde'
-            },
-            'EUR/GBP': {
-                'nom': 'Euro / Livre Sterling',
-                'symbole': 'EUR/GBP',
-                'icone': '🇪🇺🇬🇧',
-                'categorie': 'Majeures',
-                'unite': 'taux de change',
-                'prix_base': 0.8520,
-                'volatilite': 1.3,
-                'volume_journalier': 100.0,
-                'pays': ['Zone Euro', 'Royaume-Uni'],
-                'banque_centrale': ['BCE', 'BoE'],
-                'description': 'Paire croisée importante'
-            },
-            'EUR/JPY': {
-                'nom': 'Euro / Yen Japonais',
-                'symbole': 'EUR/JPY',
-                'icone': '🇪🇺🇯🇵',
-                'categorie': 'Majeures',
-                'unite': 'taux de change',
-                'prix_base': 168.50,
-                'volatilite': 1.5,
-                'volume_journalier': 120.0,
-                'pays': ['Zone Euro', 'Japon'],
-                'banque_centrale': ['BCE', 'BoJ'],
-                'description': 'Très liquide'
-            },
-            'EUR/CHF': {
-                'nom': 'Euro / Franc Suisse',
-                'symbole': 'EUR/CHF',
-                'icone': '🇪🇺🇨🇭',
-                'categorie': 'Majeures',
-                'unite': 'taux de change',
-                'prix_base': 0.9820,
-                'volatilite': 1.2,
-                'volume_journalier': 60.0,
-                'pays': ['Zone Euro', 'Suisse'],
-                'banque_centrale': ['BCE', 'SNB'],
-                'description': 'Considérée comme stable'
-            },
-            'EUR/AUD': {
-                'nom': 'Euro / Dollar Australien',
-                'symbole': 'EUR/AUD',
-                'icone': '🇪🇺🇦🇺',
-                'categorie': 'Majeures',
-                'unite': 'taux de change',
-                'prix_base': 1.6320,
-                'volatilite': 1.6,
-                'volume_journalier': 50.0,
-                'pays': ['Zone Euro', 'Australie'],
-                'banque_centrale': ['BCE', 'RBA'],
-                'description': 'Influencée par les matières premières'
-            },
-            'EUR/CAD': {
-                'nom': 'Euro / Dollar Canadien',
-                'symbole': 'EUR/CAD',
-                'icone': '🇪🇺🇨🇦',
-                'categorie': 'Majeures',
-                'unite': 'taux de change',
-                'prix_base': 1.4820,
-                'volatilite': 1.5,
-                'volume_journalier': 45.0,
-                'pays': ['Zone Euro', 'Canada'],
-                'banque_centrale': ['BCE', 'BoC'],
-                'description': 'Paire croisée importante'
-            }
+            'seed': meta['seed'],
+            'rng_state': meta['rng_state'],
+            'clock_ns': meta['clock_ns'],
+            'history': tables['history'],
+            'history_key': ('instantane', meta['created_at'], meta['seed']),
+            'live': tables['live'],
+            'simulations': tables['simulations'].to_dict('records'),
         }
-    
+
+    def snapshot(self):
+        """Métadonnées et tables de l'instantané de l'état courant"""
+        history = self.shared_history.frame() if self.shared_history is not None else self.historical_data
+        meta = {'seed': self.state['seed'], 'rng_state': self.state['rng_state'], 'clock_ns': self.state['clock_ns']}
+        tables = {
+            'history': history,
+            'live': self.state['live'],
+            'simulations': pd.DataFrame(self.state['simulations']),
+        }
+        return meta, tables
+
+    def save_live_state(self):
+        """Conserve les cotations et l'état des générateurs aléatoires pour la prochaine exécution"""
+        live = self.current_data[['symbole'] + LIVE_COLUMNS].copy()
+        if self.tick_simulator is not None:
+            live['log_mid'] = self.tick_simulator.log_mid
+            self.state['clock_ns'] = self.tick_simulator.clock_ns
+        self.state['live'] = live
+        self.state['rng_state'] = self.rng.bit_generator.state
+
+    def attach_shared_history(self):
+        """Historique publié en mémoire partagée, ou None (historique synthétique) s'il n'est pas lisible"""
+        try:
+            return attach_shared_history(SHARED_HISTORY_PATH).current()
+        except (OSError, ValueError) as e:
+            st.error(f"Historique partagé indisponible ({e}) : historique synthétique utilisé.")
+            return None
+
     def initialize_historical_data(self):
         """Initialise les données historiques des devises"""
-        dates = pd.date_range('2020-01-01', datetime.now(), freq='D')
-        data = []
-        
-        for date in dates:
-            for symbole, info in self.currencies.items():
-                base_price = info['prix_base']
-                global_impact = 1.0
-                
-                # Simulation d'impact d'événements
-                if date.year == 2020 and date.month <= 6:
-                    global_impact *= random.uniform(0.9, 1.1)
-                elif date.year == 2021:
-                    global_impact *= random.uniform(1.05, 1.15)
-                elif date.year >= 2023:
-                    global_impact *= random.uniform(0.98, 1.08)
-                
-                daily_volatility = random.normalvariate(1, info['volatilite']/100)
-                seasonal = 1 + 0.003 * np.sin(2 * np.pi * date.dayofyear / 365)
-                prix_actuel = base_price * global_impact * daily_volatility * seasonal
-                
-                data.append({
-                    'date': date,
-                    'symbole': symbole,
-                    'nom': info['nom'],
-                    'categorie': info['categorie'],
-                    'prix': prix_actuel,
-                    'volume': random.uniform(100000, 5000000),
-                    'volatilite_jour': abs(daily_volatility - 1) * 100
-                })
+        if self.state['history'] is not None:
+            return self.state['history']
+        if self.shared_history is not None:
+            return None
+        return generate_synthetic_history(self.registry, seed=self.state['seed'])
+    
+    def initialize_statistics(self):
+        """Statistiques glissantes par paire, calculées une fois par historique (voir rolling_stats.py)"""
+        if self.shared_history is not None:
+            history = self.shared_history
+            return cached_statistics(('partage', SHARED_HISTORY_PATH),
+                                     lambda: (history.dates, history.matrix(self.registry.symboles)),
+                                     self.registry, version=history.version)
         
-        return pd.DataFrame(data)
+        def load():
+            dates, _, prix = price_matrix(self.historical_data, self.registry)
+            return dates, prix
+        return cached_statistics(self.state['history_key'], load, self.registry)
+    
+    def get_history(self, symboles):
+        """Historique des paires demandées (local ou partagé)"""
+        if self.shared_history is not None:
+            return self.shared_history.frame(symboles)
+        return self.historical_data[self.historical_data['symbole'].isin(symboles)]
     
     def initialize_current_data(self):
         """Initialise les données courantes"""
-        current_data = []
-        for symbole, info in self.currencies.items():
-            last_data = self.historical_data[self.historical_data['symbole'] == symbole].iloc[-1]
-            change_pct = random.uniform(-2.0, 2.0)
-            
-            current_data.append({
-                'symbole': symbole,
-                'nom': info['nom'],
-                'icone': info['icone'],
-                'categorie': info['categorie'],
-                'unite': info['unite'],
-                'prix': last_data['prix'] * (1 + change_pct/100),
-                'change_pct': change_pct,
-                'volatilite': info['volatilite'],
-                'volume_journalier': info['volume_journalier'],
-                'pays': info['pays'],
-                'banque_centrale': info['banque_centrale'],
-                'spread': random.uniform(0.1, 2.0)
-            })
+        n_pairs = len(self.registry)
+        if self.shared_history is not None:
+            last_prices = self.shared_history.last_prices(self.registry.symboles)
+        else:
+            last_prices = (
+                self.historical_data.groupby('symbole', sort=False)['prix'].last()
+                .reindex(self.registry.symboles).to_numpy()
+            )
+        current_data = pd.DataFrame(self.registry.paires)[
+            ['symbole', 'nom', 'icone', 'categorie', 'unite']
+        ]
+        # Volatilité réalisée sur 20 jours (volatilité de la configuration tant que l'historique est trop court)
+        realized = self.statistics['vol_20'].to_numpy()
+        current_data['volatilite'] = np.where(np.isfinite(realized), realized, self.registry.volatilite)
+        current_data['volume_journalier'] = [p['volume_journalier'] for p in self.registry.paires]
+        current_data['pays'] = [p['pays'] for p in self.registry.paires]
+        current_data['banque_centrale'] = [p['banque_centrale'] for p in self.registry.paires]
         
-        return pd.DataFrame(current_data)
+        if self.state['live'] is not None:
+            # Cotations de l'exécution précédente ou de l'instantané restauré
+            live = self.state['live'].set_index('symbole').reindex(self.registry.symboles)
+            for col in LIVE_COLUMNS:
+                current_data[col] = live[col].to_numpy()
+            return current_data
+        
+        change_pct = self.rng.uniform(-2.0, 2.0, n_pairs)
+        current_data['prix'] = last_prices * (1 + change_pct/100)
+        current_data['change_pct'] = change_pct
+        current_data['spread'] = self.rng.uniform(0.1, 2.0, n_pairs)
+        half_spread = current_data['spread'].to_numpy() * self.registry.pip_size / 2
+        current_data['bid'] = current_data['prix'] - half_spread
+        current_data['ask'] = current_data['prix'] + half_spread
+        
+        return current_data
+
+    def initialize_tick_simulator(self):
+        """Initialise le simulateur de ticks corrélés à partir des cotations courantes"""
+        if TICK_RATE > 0:
+            return None
+        prix = self.current_data['prix'].to_numpy()
+        spread = self.current_data['spread'].to_numpy()
+        if self.shared_history is not None:
+            # Covariance estimée sur l'historique réel publié, lu directement dans la matrice partagée
+            history = self.shared_history
+            cov = cached_covariance(('partage', SHARED_HISTORY_PATH),
+                                    lambda: history.matrix(self.registry.symboles), history.version)
+            simulator = TickSimulator(prix, cov, spread, self.registry.pip_size,
+                                      step_seconds=LIVE_STEP_SECONDS, seed=self.rng)
+        else:
+            simulator = TickSimulator.from_registry(self.registry, prix, spread,
+                                                    step_seconds=LIVE_STEP_SECONDS, seed=self.rng)
+        live = self.state['live']
+        if live is not None and 'log_mid' in live.columns:
+            # Reprendre la marche aléatoire exactement où elle s'était arrêtée
+            simulator.log_mid = live.set_index('symbole')['log_mid'].reindex(self.registry.symboles).to_numpy()
+            simulator.clock_ns = self.state['clock_ns']
+        return simulator
 
     def update_live_data(self):
         """Met à jour les données en temps réel"""
-        for idx in self.current_data.index:
-            if random.random() < 0.6:
-                variation = random.uniform(-1.0, 1.0)
-                self.current_data.loc[idx, 'prix'] *= (1 + variation/100)
-                self.current_data.loc[idx, 'change_pct'] = variation
-                self.current_data.loc[idx, 'volume_journalier'] *= random.uniform(0.8, 1.2)
-    
+        if self.tick_simulator is None:
+            quotes = shared_feed(
+                self.registry, TICK_RATE, self.current_data['prix'].to_numpy(), self.current_data['spread'].to_numpy()
+            ).latest()
+        else:
+            self.tick_simulator.next_batch(LIVE_UPDATE_STEPS)
+            mid = self.tick_simulator.mid
+            half_spread = self.tick_simulator.half_spread
+            quotes = {'mid': mid, 'bid': mid - half_spread, 'ask': mid + half_spread}
+        
+        prix = self.current_data['prix'].to_numpy()
+        self.current_data['prix'] = quotes['mid']
+        self.current_data['bid'] = quotes['bid']
+        self.current_data['ask'] = quotes['ask']
+        self.current_data['change_pct'] = (quotes['mid'] / prix - 1) * 100
+        volume = self.current_data['volume_journalier'].to_numpy()
+        self.current_data['volume_journalier'] = volume * self.rng.uniform(0.8, 1.2, len(volume))
+        check_quotes(self.alert_engine, self.registry, self.current_data, quotes.get('timestamp'))
+        self.save_live_state()
+
     def display_header(self):
         """Affiche l'en-tête du dashboard"""
         st.markdown(
@@ -261,7 +323,7 @@ class EuroForexDashboard:
         st.markdown(
             '<div style="text-align: center; background: linear-gradient(45deg, #003399, #0055A4); '
             'color: white; padding: 1rem; border-radius: 10px; margin-bottom: 2rem;">'
-            '<h3>🔴 SURVEILLANCE DES 6 PRINCIPALES PAIRES AVEC L\'EURO</h3>'
+            f'<h3>🔴 SURVEILLANCE DES {len(self.currencies)} PRINCIPALES PAIRES AVEC L\'EURO</h3>'
             '</div>', 
             unsafe_allow_html=True
         )
@@ -280,6 +342,7 @@ class EuroForexDashboard:
             
             for j, (_, currency) in enumerate(self.current_data.iloc[i:i+3].iterrows()):
                 with cols[j]:
+                    stats = self.statistics.loc[currency['symbole']]
                     change_class = "positive" if currency['change_pct'] > 0 else "negative" if currency['change_pct'] < 0 else "neutral"
                     
                     st.markdown(f"""
@@ -297,8 +360,9 @@ class EuroForexDashboard:
                             {currency['change_pct']:+.2f}%
                         </div>
                         <div style="margin-top: 1rem; font-size: 0.8rem;">
+                            💱 Bid/Ask: {currency['bid']:.4f} / {currency['ask']:.4f}<br>
                             📊 Vol: {currency['volume_journalier']:.1f}B<br>
-                            📈 Volatilité: {currency['volatilite']:.1f}%
+                            {card_statistics(stats, currency['volatilite'])}
                         </div>
                     </div>
                     """, unsafe_allow_html=True)
@@ -324,9 +388,7 @@ class EuroForexDashboard:
                 index=3
             )
         
-        filtered_data = self.historical_data[
-            self.historical_data['symbole'].isin(selected_currencies)
-        ]
+        filtered_data = self.get_history(selected_currencies)
         
         if period != 'Toute la période':
             if 'mois' in period:
@@ -388,6 +450,9 @@ class EuroForexDashboard:
                 value=10,
                 step=1
             )
+            
+            if self.statistics is not None:
+                st.caption(statistics_caption(self.statistics.loc[selected_pair]))
         
         with col2:
             entry_date = st.date_input(
@@ -422,10 +487,13 @@ class EuroForexDashboard:
                     step=0.1
                 )
         
+        # Spread coté sur les cartes (bid/ask) par défaut
+        pair_id = self.registry.id_of(selected_pair)
+        costs = render_cost_inputs(self.current_data['spread'].iloc[pair_id],
+                                   self.current_data['volatilite'].iloc[pair_id])
+        
         if st.button("Lancer la simulation", type="primary"):
-            pair_data = self.historical_data[
-                self.historical_data['symbole'] == selected_pair
-            ].copy()
+            pair_data = self.get_history([selected_pair]).copy()
             
             filtered_data = pair_data[
                 (pair_data['date'] >= pd.to_datetime(entry_date)) & 
@@ -434,63 +502,28 @@ class EuroForexDashboard:
             
             if len(filtered_data) > 0:
                 entry_price = filtered_data.iloc[0]['prix']
-                exit_price = filtered_data.iloc[-1]['prix']
-                
-                if position_type == "Achat (Long)":
-                    pip_change = (exit_price - entry_price) / (0.0001 if 'JPY' not in selected_pair else 0.01)
-                    price_change_pct = ((exit_price - entry_price) / entry_price) * 100
-                else:
-                    pip_change = (entry_price - exit_price) / (0.0001 if 'JPY' not in selected_pair else 0.01)
-                    price_change_pct = ((entry_price - exit_price) / entry_price) * 100
-                
-                leveraged_investment = investment_amount * leverage
-                profit_loss = leveraged_investment * (price_change_pct / 100)
-                roi = (profit_loss / investment_amount) * 100
-                
-                stop_loss_triggered = False
-                take_profit_triggered = False
-                
-                for i in range(1, len(filtered_data)):
-                    current_price = filtered_data.iloc[i]['prix']
-                    
-                    if position_type == "Achat (Long)":
-                        if current_price <= entry_price * (1 - stop_loss_pct/100):
-                            stop_loss_triggered = True
-                            exit_price = current_price
-                            # Recalculer
-                            pip_change = (exit_price - entry_price) / (0.0001 if 'JPY' not in selected_pair else 0.01)
-                            price_change_pct = ((exit_price - entry_price) / entry_price) * 100
-                            profit_loss = leveraged_investment * (price_change_pct / 100)
-                            roi = (profit_loss / investment_amount) * 100
-                            break
-                        if current_price >= entry_price * (1 + take_profit_pct/100):
-                            take_profit_triggered = True
-                            exit_price = current_price
-                            # Recalculer
-                            pip_change = (exit_price - entry_price) / (0.0001 if 'JPY' not in selected_pair else 0.01)
-                            price_change_pct = ((exit_price - entry_price) / entry_price) * 100
-                            profit_loss = leveraged_investment * (price_change_pct / 100)
-                            roi = (profit_loss / investment_amount) * 100
-                            break
-                    else:
-                        if current_price >= entry_price * (1 + stop_loss_pct/100):
-                            stop_loss_triggered = True
-                            exit_price = current_price
-                            # Recalculer
-                            pip_change = (entry_price - exit_price) / (0.0001 if 'JPY' not in selected_pair else 0.01)
-                            price_change_pct = ((entry_price - exit_price) / entry_price) * 100
-                            profit_loss = leveraged_investment * (price_change_pct / 100)
-                            roi = (profit_loss / investment_amount) * 100
-                            break
-                        if current_price <= entry_price * (1 - take_profit_pct/100):
-                            take_profit_triggered = True
-                            exit_price = current_price
-                            # Recalculer
-                            pip_change = (entry_price - exit_price) / (0.0001 if 'JPY' not in selected_pair else 0.01)
-                            price_change_pct = ((entry_price - exit_price) / entry_price) * 100
-                            profit_loss = leveraged_investment * (price_change_pct / 100)
-                            roi = (profit_loss / investment_amount) * 100
-                            break
+                result = simulate_trade(
+                    filtered_data['prix'].to_numpy(),
+                    position_type == "Achat (Long)",
+                    stop_loss_pct, take_profit_pct, leverage, investment_amount,
+                    self.registry.pip_size[self.registry.id_of(selected_pair)],
+                    costs=costs, dates=filtered_data['date'].to_numpy()
+                )
+                self.state['simulations'].append({
+                    'symbole': selected_pair, 'position': position_type,
+                    'investissement': investment_amount, 'levier': leverage,
+                    'date_entree': pd.Timestamp(entry_date), 'date_sortie': pd.Timestamp(exit_date),
+                    'stop_loss_pct': stop_loss_pct, 'take_profit_pct': take_profit_pct, **costs,
+                    **{key: result[key] for key in ('entry_price', 'exit_price', 'statut', 'pip_change', 'profit_loss', 'roi')},
+                })
+                exit_price = result['exit_price']
+                pip_change = result['pip_change']
+                price_change_pct = result['price_change_pct']
+                leveraged_investment = result['leveraged_investment']
+                profit_loss = result['profit_loss']
+                roi = result['roi']
+                stop_loss_triggered = result['statut'] == STATUT_STOP_LOSS
+                take_profit_triggered = result['statut'] == STATUT_TAKE_PROFIT
                 
                 st.markdown("### Résultats de la simulation")
                 
@@ -512,6 +545,7 @@ class EuroForexDashboard:
                     <p>ROI: {profit_loss_symbol}{roi:.2f}%</p>
                     <p>Investissement: €{investment_amount:.2f} (Levier: {leverage}x)</p>
                     <p>Valeur position: €{leveraged_investment:.2f}</p>
+                    <p>Frais: €{result['costs']:.2f} (spread €{result['cost_spread']:.2f}, commission €{result['cost_commission']:.2f}, swap €{result['cost_swap']:.2f}, slippage €{result['cost_slippage']:.2f})</p>
                 </div>
                 """, unsafe_allow_html=True)
                 
@@ -523,7 +557,7 @@ class EuroForexDashboard:
                 fig = go.Figure()
                 fig.add_trace(go.Scatter(x=filtered_data['date'], y=filtered_data['prix'], mode='lines', name='Prix', line=dict(color='#003399')))
                 fig.add_trace(go.Scatter(x=[filtered_data.iloc[0]['date']], y=[entry_price], mode='markers', name='Entrée', marker=dict(color='green', size=10)))
-                fig.add_trace(go.Scatter(x=[filtered_data.iloc[-1]['date'] if not stop_loss_triggered and not take_profit_triggered else filtered_data.iloc[min(i, len(filtered_data)-1)]['date']], y=[exit_price], mode='markers', name='Sortie', marker=dict(color='red', size=10)))
+                fig.add_trace(go.Scatter(x=[filtered_data.iloc[result['exit_idx']]['date']], y=[exit_price], mode='markers', name='Sortie', marker=dict(color='red', size=10)))
                 
                 if position_type == "Achat (Long)":
                     fig.add_hline(y=entry_price * (1 - stop_loss_pct/100), line_dash="dash", line_color="red", annotation_text="Stop Loss")
@@ -536,6 +570,27 @@ class EuroForexDashboard:
                 st.plotly_chart(fig, width='stretch')
             else:
                 st.error("Aucune donnée disponible pour la période sélectionnée.")
+        
+        if self.state['simulations']:
+            st.markdown("### Simulations de la session")
+            st.dataframe(pd.DataFrame(self.state['simulations']), width='stretch')
+
+    def create_snapshot_panel(self):
+        """Enregistrement, export et import de l'état du dashboard (barre latérale)"""
+        with st.sidebar.expander("💾 Sauvegarde de l'état"):
+            if st.button("Enregistrer l'état", key='snapshot_save'):
+                save_snapshot(SNAPSHOT_PATH, *self.snapshot())
+                st.success(f"État enregistré dans {SNAPSHOT_PATH}")
+            if os.path.exists(SNAPSHOT_PATH):
+                # Fichier lu seulement au clic (génération différée), pas à chaque exécution
+                st.download_button("Exporter l'instantané", read_snapshot_bytes,
+                                   file_name=os.path.basename(SNAPSHOT_PATH), key='snapshot_download')
+            uploaded = st.file_uploader("Importer un instantané", type=['npz'], key='snapshot_upload')
+            if uploaded is not None and uploaded.file_id != self.state.get('imported'):
+                state = self.state_from_snapshot(*load_snapshot(uploaded.getvalue()))
+                state['imported'] = uploaded.file_id
+                st.session_state['dashboard_state'] = state
+                st.rerun()
 
     def run(self):
         """Exécute le dashboard"""
@@ -553,6 +608,9 @@ class EuroForexDashboard:
         elif menu == "Simulateur de trading":
             self.create_trading_simulator()
         
+        render_alert_panel(self.alert_engine, self.registry, self.current_data)
+        self.create_snapshot_panel()
+        
         if st.sidebar.button("Mettre à jour les données"):
             self.update_live_data()
             st.rerun() # Correction ici
@@ -0,0 +1,369 @@
+# alerts.py
+"""Moteur d'alertes de prix évalué à chaque mise à jour des cotations.
+
+Trois types de règles, toutes à déclenchement unique :
+
+- ``seuil`` : le prix franchit ``niveau`` à la hausse ou à la baisse ;
+- ``variation`` : le prix a varié de plus de ``niveau`` % sur les ``fenetre``
+  dernières secondes (hausse depuis le plus bas ou baisse depuis le plus haut) ;
+- ``moyenne`` : le prix croise sa moyenne mobile sur les ``fenetre`` dernières
+  mises à jour.
+
+Les règles sont indexées par paire et triées par niveau : une mise à jour ne
+consulte, par recherche dichotomique, que les règles qu'elle peut déclencher.
+Les alertes déclenchées sont transmises aux ``sinks`` (journal JSON, webhook).
+Les deux dashboards partagent le panneau Streamlit de ce module
+(``render_alert_panel``, ``check_quotes``).
+"""
+import json
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+TYPES = ('seuil', 'variation', 'moyenne')
+HAUSSE = 1
+BAISSE = -1
+
+# Types de règles proposés dans le panneau des dashboards
+ALERT_TYPES = {'Seuil de prix': 'seuil', 'Variation (%)': 'variation', 'Croisement moyenne mobile': 'moyenne'}
+
+
+class AlertEngine:
+    """Règles d'alerte d'un ensemble de paires, évaluées sur les cotations successives."""
+
+    def __init__(self, registry, sinks=None):
+        self.registry = registry
+        self.sinks = list(sinks or [])
+        n_pairs = len(registry)
+        self._lock = threading.Lock()
+
+        # Colonnes des règles, indexées par identifiant de règle
+        self._columns = {'pair_id': [], 'type': [], 'direction': [], 'niveau': [], 'fenetre': []}
+        self.labels = []
+        self.actif = np.zeros(0, dtype=bool)
+        self._index = None
+
+        # État par paire : dernier prix et historique récent (une ligne par mise à jour)
+        self.last_price = np.full(n_pairs, np.nan)
+        self.last_sma = {}
+        self.last_quotes_ns = None
+        self._updates = [deque() for _ in range(n_pairs)]  # (timestamp_ns, bas, haut, clôture)
+        self._max_age_ns = 0
+        self._max_points = 0
+        self.fired = []
+
+    def __len__(self):
+        return len(self.labels)
+
+    def add_rule(self, symbole, type, niveau, direction=HAUSSE, fenetre=0.0, label=None):
+        """Ajoute une règle et retourne son identifiant."""
+        if type not in TYPES:
+            raise ValueError(f"Type de règle inconnu : {type}")
+        ids = self.add_rules([symbole], type, [niveau], direction, fenetre, [label])
+        return int(ids[0])
+
+    def add_rules(self, symboles, type, niveaux, direction=HAUSSE, fenetre=0.0, labels=None):
+        """Ajoute un lot de règles de même type (paramètres scalaires ou tableaux)."""
+        if type not in TYPES:
+            raise ValueError(f"Type de règle inconnu : {type}")
+        pair_ids = self.registry.ids_of(list(symboles))
+        if (pair_ids < 0).any():
+            raise ValueError("Paire inconnue dans les règles d'alerte")
+        n = len(pair_ids)
+        direction = np.broadcast_to(np.asarray(direction, dtype=np.int8), n)
+        fenetre = np.broadcast_to(np.asarray(fenetre, dtype=np.float64), n)
+        with self._lock:
+            start = len(self.labels)
+            self._columns['pair_id'].append(pair_ids.astype(np.int16))
+            self._columns['type'].append(np.full(n, TYPES.index(type), dtype=np.int8))
+            self._columns['direction'].append(direction)
+            self._columns['niveau'].append(np.broadcast_to(np.asarray(niveaux, dtype=np.float64), n))
+            self._columns['fenetre'].append(fenetre)
+            self.labels.extend(labels if labels is not None else [None] * n)
+            self.actif = np.concatenate([self.actif, np.ones(n, dtype=bool)])
+            self._index = None
+            if type == 'variation':
+                self._max_age_ns = max(self._max_age_ns, int(fenetre.max() * 1e9))
+            elif type == 'moyenne':
+                self._max_points = max(self._max_points, int(fenetre.max()) + 1)
+            return np.arange(start, start + n)
+
+    def rules(self):
+        """Colonnes des règles (tableaux indexés par identifiant de règle)."""
+        with self._lock:
+            return self._consolidate()
+
+    def _consolidate(self):
+        for key, parts in self._columns.items():
+            if len(parts) > 1:
+                self._columns[key] = [np.concatenate(parts)]
+        return {key: parts[0] if parts else np.empty(0) for key, parts in self._columns.items()}
+
+    def _build_index(self):
+        """Regroupe les règles actives par (paire, type, direction, fenêtre), triées par niveau."""
+        rules = self._rules = self._consolidate()
+        ids = np.flatnonzero(self.actif)
+        order = np.lexsort((rules['niveau'][ids], rules['fenetre'][ids], rules['direction'][ids],
+                            rules['type'][ids], rules['pair_id'][ids]))
+        ids = ids[order]
+        index = {}
+        if ids.size:
+            group = np.stack([rules['pair_id'][ids], rules['type'][ids], rules['direction'][ids], rules['fenetre'][ids]], axis=1)
+            bounds = np.flatnonzero((group[1:] != group[:-1]).any(axis=1)) + 1
+            for part in np.split(np.arange(ids.size), bounds):
+                pair_id, type_id, direction, fenetre = group[part[0]]
+                key = (int(pair_id), TYPES[int(type_id)], int(direction), float(fenetre))
+                index[key] = (rules['niveau'][ids[part]], ids[part])
+        self._index = index
+        self._indexed = ids.size
+        self._stale = 0
+        self._by_pair = {}
+        for key in index:
+            self._by_pair.setdefault(key[0], []).append(key)
+
+    def on_quotes(self, prix, timestamp=None):
+        """Évalue les règles sur une cotation par paire (tableau indexé par identifiant).
+
+        ``timestamp`` (epoch en nanosecondes, maintenant par défaut) identifie la
+        cotation : une cotation qui n'est pas plus récente que la précédente
+        (même cache relu par une réexécution) est ignorée.
+        """
+        timestamp = np.int64(timestamp if timestamp is not None else datetime.now().timestamp() * 1e9)
+        with self._lock:
+            if self.last_quotes_ns is not None and timestamp <= self.last_quotes_ns:
+                return []
+            self.last_quotes_ns = timestamp
+        prix = np.asarray(prix, dtype=np.float64)
+        n_pairs = len(self.registry)
+        return self.on_ticks({
+            'timestamp': np.full(n_pairs, timestamp, dtype=np.int64),
+            'pair_id': np.arange(n_pairs),
+            'mid': prix,
+        })
+
+    def on_ticks(self, batch):
+        """Évalue les règles sur un lot de ticks (format ``TickSimulator.next_batch``).
+
+        Utilisable directement comme ``sink`` d'un ``TickFeed``.
+        """
+        pair_ids = np.asarray(batch['pair_id'])
+        mids = np.asarray(batch['mid'], dtype=np.float64)
+        timestamps = np.asarray(batch['timestamp'], dtype=np.int64)
+        alerts = []
+        with self._lock:
+            if self._index is None:
+                self._build_index()
+            for pair_id in np.unique(pair_ids):
+                rows = np.flatnonzero((pair_ids == pair_id) & np.isfinite(mids))
+                if rows.size:
+                    alerts.extend(self._check_pair(int(pair_id), mids[rows], timestamps[rows]))
+            # Les règles déclenchées restent dans l'index (filtrées par ``actif``)
+            # jusqu'à ce qu'elles en représentent la moitié
+            if self._stale * 2 > self._indexed:
+                self._index = None
+        if alerts:
+            self.fired.extend(alerts)
+            for sink in self.sinks:
+                sink(alerts)
+        return alerts
+
+    def _check_pair(self, pair_id, path, timestamps):
+        previous = self.last_price[pair_id]
+        self.last_price[pair_id] = path[-1]
+        now = int(timestamps[-1])
+        updates = self._updates[pair_id]
+        updates.append((now, float(path.min()), float(path.max()), float(path[-1])))
+        # Conserver l'historique nécessaire aux règles de variation et de moyenne
+        while len(updates) > max(1, self._max_points) and updates[0][0] < now - self._max_age_ns:
+            updates.popleft()
+
+        fired = []
+        crossings = {}
+        for key in self._by_pair.get(pair_id, ()):
+            _, type, direction, fenetre = key
+            niveaux, ids = self._index[key]
+            if type == 'seuil':
+                hit = self._crossed_levels(niveaux, np.concatenate([[previous], path]), direction)
+            elif type == 'variation':
+                hit = self._moved_levels(niveaux, updates, now, fenetre, direction)
+            else:
+                n_points = int(fenetre)
+                if n_points not in crossings:
+                    crossings[n_points] = self._average_crossing(pair_id, updates, n_points)
+                hit = np.full(ids.size, crossings[n_points] == direction)
+            hit_ids = ids[hit]
+            hit_ids = hit_ids[self.actif[hit_ids]]
+            if hit_ids.size:
+                self.actif[hit_ids] = False
+                self._stale += hit_ids.size
+                fired.extend(self._alert(rule_id, type, direction, path[-1], now) for rule_id in hit_ids)
+        return fired
+
+    @staticmethod
+    def _crossed_levels(niveaux, path, direction):
+        """Niveaux triés franchis dans le sens ``direction`` entre deux points consécutifs du chemin."""
+        path = path[np.isfinite(path)]
+        hit = np.zeros(niveaux.size, dtype=bool)
+        if path.size < 2:
+            return hit
+        before, after = path[:-1], path[1:]
+        moves = (after > before) if direction == HAUSSE else (after < before)
+        if not moves.any():
+            return hit
+        # Intervalle de niveaux franchis par chaque mouvement, réunis par tableau de différences
+        if direction == HAUSSE:
+            lo = np.searchsorted(niveaux, before[moves], side='right')
+            hi = np.searchsorted(niveaux, after[moves], side='right')
+        else:
+            lo = np.searchsorted(niveaux, after[moves], side='left')
+            hi = np.searchsorted(niveaux, before[moves], side='left')
+        counts = np.zeros(niveaux.size + 1, dtype=np.int64)
+        np.add.at(counts, lo, 1)
+        np.add.at(counts, hi, -1)
+        return np.cumsum(counts[:-1]) > 0
+
+    @staticmethod
+    def _moved_levels(niveaux, updates, now, fenetre, direction):
+        """Seuils de variation (%) dépassés sur la fenêtre glissante de ``fenetre`` secondes."""
+        since = now - int(fenetre * 1e9)
+        window = [u for u in updates if u[0] >= since]
+        close = updates[-1][3]
+        if direction == HAUSSE:
+            move = (close / min(u[1] for u in window) - 1) * 100
+        else:
+            move = (1 - close / max(u[2] for u in window)) * 100
+        return np.arange(niveaux.size) < np.searchsorted(niveaux, move, side='right')
+
+    def _average_crossing(self, pair_id, updates, n_points):
+        """Sens du croisement entre le dernier prix et sa moyenne mobile sur ``n_points`` mises à jour (0 sinon)."""
+        closes = np.array([u[3] for u in list(updates)[-n_points:]])
+        was_above = self.last_sma.get((pair_id, n_points))
+        mean = closes.mean()
+        # Un prix égal à sa moyenne ne croise pas : on garde la position précédente
+        is_above = was_above if closes[-1] == mean else closes[-1] > mean
+        self.last_sma[(pair_id, n_points)] = is_above
+        if closes.size < n_points or was_above is None or is_above is None or was_above == is_above:
+            return 0
+        return HAUSSE if is_above else BAISSE
+
+    def _alert(self, rule_id, type, direction, prix, timestamp):
+        label = self.labels[rule_id]
+        symbole = self.registry.symboles[int(self._rules['pair_id'][rule_id])]
+        sens = 'hausse' if direction == HAUSSE else 'baisse'
+        niveau = float(self._rules['niveau'][rule_id])
+        if type == 'seuil':
+            message = f"{symbole} franchit {niveau:.5f} à la {sens}"
+        elif type == 'variation':
+            message = f"{symbole} : {sens} de plus de {niveau:.2f}%"
+        else:
+            message = f"{symbole} croise sa moyenne mobile à la {sens}"
+        return {
+            'rule_id': int(rule_id),
+            'symbole': symbole,
+            'type': type,
+            'direction': sens,
+            'niveau': niveau,
+            'prix': float(prix),
+            'timestamp': datetime.fromtimestamp(timestamp / 1e9).isoformat(timespec='seconds'),
+            'message': label or message,
+        }
+
+
+class LogSink:
+    """Ajoute chaque alerte déclenchée, au format JSON, à un fichier journal."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, alerts):
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            for alert in alerts:
+                f.write(json.dumps(alert, ensure_ascii=False) + '\n')
+
+
+class WebhookSink:
+    """Envoie les alertes déclenchées en POST JSON, sans bloquer l'évaluation des règles."""
+
+    def __init__(self, url, timeout=5.0):
+        import requests
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='alert-webhook')
+
+    def _post(self, alerts):
+        try:
+            self.session.post(self.url, json={'alerts': alerts}, timeout=self.timeout)
+        except Exception:
+            pass  # Une alerte non livrée reste dans le journal et la barre latérale
+
+    def __call__(self, alerts):
+        self._executor.submit(self._post, list(alerts))
+
+
+def default_sinks():
+    """Sinks configurés par l'environnement (``FOREX_ALERT_LOG``, ``FOREX_ALERT_WEBHOOK``)."""
+    sinks = []
+    if os.environ.get('FOREX_ALERT_LOG'):
+        sinks.append(LogSink(os.environ['FOREX_ALERT_LOG']))
+    if os.environ.get('FOREX_ALERT_WEBHOOK'):
+        sinks.append(WebhookSink(os.environ['FOREX_ALERT_WEBHOOK']))
+    return sinks
+
+
+def session_alert_engine(registry):
+    """Moteur d'alertes de la session Streamlit courante (conservé d'une exécution à l'autre)."""
+    import streamlit as st
+
+    if 'alert_engine' not in st.session_state:
+        st.session_state['alert_engine'] = AlertEngine(registry, default_sinks())
+    return st.session_state['alert_engine']
+
+
+def check_quotes(engine, registry, current_data, timestamp=None):
+    """Évalue les règles sur les cotations d'un dashboard (colonnes ``symbole``, ``prix``).
+
+    ``timestamp`` identifie la cotation (voir ``AlertEngine.on_quotes``) ; les
+    alertes déclenchées sont affichées en notification.
+    """
+    import streamlit as st
+
+    if current_data.empty:
+        return
+    prix = current_data.set_index('symbole')['prix'].reindex(registry.symboles).to_numpy()
+    for alert in engine.on_quotes(prix, timestamp):
+        st.toast(f"🔔 {alert['message']}")
+
+
+def render_alert_panel(engine, registry, current_data):
+    """Création des règles d'alerte et dernières alertes déclenchées (barre latérale)."""
+    import streamlit as st
+
+    with st.sidebar.expander("🔔 Alertes"):
+        symbole = st.selectbox("Paire:", registry.symboles, key='alert_pair')
+        type_label = st.selectbox("Type d'alerte:", list(ALERT_TYPES), key='alert_type')
+        rule_type = ALERT_TYPES[type_label]
+        direction = st.radio("Sens:", ["Hausse", "Baisse"], horizontal=True, key='alert_direction')
+        fenetre = 0.0
+        if rule_type == 'seuil':
+            current = registry.info(symbole)['prix_base']
+            if not current_data.empty:
+                current = current_data.set_index('symbole')['prix'].get(symbole, current)
+            niveau = st.number_input("Niveau:", value=float(current), format="%.5f", key='alert_level')
+        elif rule_type == 'variation':
+            niveau = st.number_input("Variation (%):", min_value=0.01, value=0.5, step=0.1, key='alert_pct')
+            fenetre = 60.0 * st.number_input("Fenêtre (minutes):", min_value=1, value=15, key='alert_window')
+        else:
+            niveau = 0.0
+            fenetre = st.number_input("Moyenne mobile (mises à jour):", min_value=2, value=20, key='alert_points')
+        if st.button("Ajouter l'alerte", key='alert_add'):
+            engine.add_rule(symbole, rule_type, niveau, HAUSSE if direction == "Hausse" else BAISSE, fenetre)
+
+        st.caption(f"{int(engine.actif.sum())} règle(s) active(s)")
+        for alert in reversed(engine.fired[-5:]):
+            st.warning(f"{alert['timestamp']} — {alert['message']}")
@@ -0,0 +1,188 @@
+# batch.py
+"""Mode batch : exécute des scénarios de trading sans l'interface web.
+
+Exemple :
+
+    python batch.py scenarios.csv -o resultats.parquet --source synthetic --workers 8
+
+Le fichier de scénarios (CSV, JSON ou JSON Lines) contient les colonnes
+``pair, direction, entry, exit, stop_loss, take_profit, leverage`` et,
+optionnellement, ``investment`` ainsi que les frais ``spread_pips,
+commission_pct, swap_long_pct, swap_short_pct, slippage`` (qui remplacent
+alors les valeurs par défaut de la ligne de commande).
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from currencies import load_registry
+from history import load_history
+from simulation import simulate_trades
+
+STATUTS = np.array(['invalide', 'sortie', 'stop_loss', 'take_profit'])
+# Libellés de direction acceptés (insensibles à la casse) ; les autres sont invalides
+LONG_DIRECTIONS = {'long', 'achat', 'buy', 'achat (long)'}
+SHORT_DIRECTIONS = {'short', 'vente', 'sell', 'vente (short)'}
+COST_COLUMNS = ['spread_pips', 'commission_pct', 'swap_long_pct', 'swap_short_pct', 'slippage']
+
+# Historique partagé par les processus de calcul (initialisé une fois par worker)
+_HISTORY = {}
+
+
+def _init_worker(dates, registry, prix):
+    _HISTORY['dates'] = dates
+    _HISTORY['registry'] = registry
+    _HISTORY['prix'] = prix
+
+
+def run_scenarios(scenarios, investment=1000.0, costs=None):
+    """Simule un bloc de scénarios sur l'historique du worker courant.
+
+    ``costs`` donne les frais par défaut (``spread_pips`` à None = spread du
+    registre) ; None désactive le calcul des frais.
+    """
+    dates = _HISTORY['dates']
+    registry = _HISTORY['registry']
+    pair_idx = registry.ids_of(scenarios['pair'])
+    known = pair_idx >= 0
+    pair_idx = np.where(known, pair_idx, 0)
+    entry = pd.to_datetime(scenarios['entry']).to_numpy(dtype='datetime64[ns]')
+    exit_ = pd.to_datetime(scenarios['exit']).to_numpy(dtype='datetime64[ns]')
+    entry_idx = np.searchsorted(dates, entry, side='left')
+    exit_idx = np.searchsorted(dates, exit_, side='right') - 1
+
+    direction = scenarios['direction'].astype(str).str.strip().str.lower()
+    is_long = direction.isin(LONG_DIRECTIONS)
+    valid = known & (is_long | direction.isin(SHORT_DIRECTIONS)).to_numpy()
+    # Période hors de l'historique : pas de simulation sur une barre de substitution
+    valid &= (entry >= dates[0]) & (exit_ <= dates[-1])
+    entry_idx = np.where(valid, entry_idx, -1)
+    if 'investment' in scenarios.columns:
+        investment = scenarios['investment'].to_numpy(dtype=np.float64)
+
+    if costs is not None:
+        costs = dict(costs, volatilite=registry.volatilite[pair_idx])
+        if costs.get('spread_pips') is None:
+            costs['spread_pips'] = registry.spread_pips[pair_idx]
+        for column in COST_COLUMNS:
+            if column in scenarios.columns:
+                costs[column] = scenarios[column].to_numpy(dtype=np.float64)
+
+    result = simulate_trades(
+        _HISTORY['prix'], pair_idx, entry_idx, exit_idx, is_long.to_numpy(),
+        scenarios['stop_loss'].to_numpy(dtype=np.float64),
+        scenarios['take_profit'].to_numpy(dtype=np.float64),
+        scenarios['leverage'].to_numpy(dtype=np.float64),
+        investment,
+        registry.pip_size[pair_idx],
+        costs=costs, dates=dates,
+    )
+    exit_pos = result.pop('exit_idx')
+    statut = result.pop('statut')
+    out = scenarios.reset_index(drop=True).copy()
+    exit_dates = dates[np.maximum(exit_pos, 0)].copy()
+    exit_dates[exit_pos < 0] = np.datetime64('NaT')
+    out['exit_date'] = exit_dates
+    out['statut'] = STATUTS[statut + 1]
+    for key, values in result.items():
+        out[key] = values
+    return out
+
+
+def read_scenarios(path, chunk_size):
+    """Lit le fichier de scénarios par blocs."""
+    if path.endswith('.jsonl'):
+        yield from pd.read_json(path, lines=True, chunksize=chunk_size)
+    elif path.endswith('.json'):
+        df = pd.read_json(path)
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size]
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+class ResultWriter:
+    """Écrit les résultats au fil de l'eau en CSV ou Parquet."""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.endswith('.parquet')
+        self.writer = None
+        self.rows = 0
+
+    def write(self, df):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.path, table.schema)
+            self.writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode='w' if self.rows == 0 else 'a', header=self.rows == 0, index=False)
+        self.rows += len(df)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulations de trading Forex en mode batch")
+    parser.add_argument('scenarios', help="Fichier de scénarios (.csv, .json ou .jsonl)")
+    parser.add_argument('-o', '--output', required=True, help="Fichier de résultats (.csv ou .parquet)")
+    parser.add_argument('--source', choices=['synthetic', 'yahoo', 'offline'], default='synthetic')
+    parser.add_argument('--history', help="Historique hors-ligne (.csv ou .parquet) pour --source offline")
+    parser.add_argument('--currencies', help="Configuration des paires (JSON), par défaut currencies.json")
+    parser.add_argument('--seed', type=int, default=None, help="Graine de l'historique synthétique")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-size', type=int, default=50_000)
+    parser.add_argument('--investment', type=float, default=1000.0, help="Montant par défaut (€)")
+    parser.add_argument('--spread', type=float, default=None, help="Spread en pips (défaut : celui du registre)")
+    parser.add_argument('--commission', type=float, default=0.0, help="Commission par exécution (%% du nominal)")
+    parser.add_argument('--swap-long', type=float, default=0.0, help="Swap par nuit d'une position longue (%% du nominal)")
+    parser.add_argument('--swap-short', type=float, default=0.0, help="Swap par nuit d'une position courte (%% du nominal)")
+    parser.add_argument('--slippage', type=float, default=0.0, help="Glissement par exécution (x volatilité journalière)")
+    parser.add_argument('--no-costs', action='store_true', help="Ignorer les frais de transaction")
+    args = parser.parse_args(argv)
+    if args.source == 'offline' and not args.history:
+        parser.error("--history est requis avec --source offline")
+
+    registry = load_registry(args.currencies)
+    costs = None if args.no_costs else {
+        'spread_pips': args.spread,
+        'commission_pct': args.commission,
+        'swap_long_pct': args.swap_long,
+        'swap_short_pct': args.swap_short,
+        'slippage': args.slippage,
+    }
+    dates, prix = load_history(registry, args.source, args.history, args.seed)
+    chunks = read_scenarios(args.scenarios, args.chunk_size)
+    writer = ResultWriter(args.output)
+    try:
+        if args.workers <= 1:
+            _init_worker(dates, registry, prix)
+            for chunk in chunks:
+                writer.write(run_scenarios(chunk, args.investment, costs))
+        else:
+            with ProcessPoolExecutor(args.workers, initializer=_init_worker,
+                                     initargs=(dates, registry, prix)) as executor:
+                pending = []
+                for chunk in chunks:
+                    pending.append(executor.submit(run_scenarios, chunk, args.investment, costs))
+                    # Borner la mémoire : écrire dans l'ordre dès que la file est pleine
+                    while len(pending) > 2 * args.workers:
+                        writer.write(pending.pop(0).result())
+                for future in pending:
+                    writer.write(future.result())
+    finally:
+        writer.close()
+    print(f"{writer.rows} scénarios simulés -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
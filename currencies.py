@@ -0,0 +1,96 @@
+# currencies.py
+"""Registre des paires de devises partagé par les dashboards et le mode batch.
+
+Les paires sont chargées depuis un fichier JSON (``currencies.json`` par défaut,
+ou le chemin de la variable d'environnement ``FOREX_CURRENCIES_CONFIG``). Chaque
+paire reçoit un identifiant entier égal à sa position dans le registre : les
+métadonnées numériques sont stockées dans des tableaux numpy indexés par cet
+identifiant, et les matrices de prix utilisent le même ordre de colonnes.
+"""
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'currencies.json')
+
+
+class CurrencyRegistry:
+    """Paires de devises indexées par identifiant entier."""
+
+    def __init__(self, paires):
+        self.paires = [self._normalize(p) for p in paires]
+        self.symboles = [p['symbole'] for p in self.paires]
+        self.index = pd.Index(self.symboles)
+        if not self.index.is_unique:
+            raise ValueError("Symboles de paires en double dans la configuration")
+
+        self.devises = sorted({p['base'] for p in self.paires} | {p['quote'] for p in self.paires})
+        devise_ids = {code: i for i, code in enumerate(self.devises)}
+        self.base_id = np.array([devise_ids[p['base']] for p in self.paires], dtype=np.int16)
+        self.quote_id = np.array([devise_ids[p['quote']] for p in self.paires], dtype=np.int16)
+
+        self.pip_size = np.array([p['pip_size'] for p in self.paires], dtype=np.float64)
+        self.tick_size = np.array([p['tick_size'] for p in self.paires], dtype=np.float64)
+        self.prix_base = np.array([p['prix_base'] for p in self.paires], dtype=np.float64)
+        self.volatilite = np.array([p['volatilite'] for p in self.paires], dtype=np.float64)
+        self.spread_pips = np.array([p['spread_pips'] for p in self.paires], dtype=np.float64)
+        self.tickers = [p['yfinance_ticker'] for p in self.paires]
+        self.noms = np.array([p['nom'] for p in self.paires], dtype=object)
+
+    @staticmethod
+    def _normalize(paire):
+        """Complète les métadonnées optionnelles d'une paire."""
+        paire = dict(paire)
+        base, quote = paire['symbole'].split('/')
+        paire.setdefault('base', base)
+        paire.setdefault('quote', quote)
+        paire.setdefault('nom', paire['symbole'])
+        paire.setdefault('icone', '💱')
+        paire.setdefault('categorie', 'Croisées')
+        paire.setdefault('unite', 'taux de change')
+        paire.setdefault('prix_base', 1.0)
+        paire.setdefault('volatilite', 1.0)
+        paire.setdefault('volume_journalier', 0.0)
+        paire.setdefault('pays', [])
+        paire.setdefault('banque_centrale', [])
+        paire.setdefault('description', '')
+        paire.setdefault('yfinance_ticker', f"{paire['base']}{paire['quote']}=X")
+        paire.setdefault('pip_size', 0.01 if paire['quote'] == 'JPY' else 0.0001)
+        paire.setdefault('tick_size', paire['pip_size'] / 10)
+        paire.setdefault('spread_pips', 1.0)
+        return paire
+
+    @classmethod
+    def from_config(cls, path):
+        """Charge le registre depuis un fichier JSON ``{"paires": [...]}``."""
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+        return cls(config['paires'])
+
+    def __len__(self):
+        return len(self.paires)
+
+    def id_of(self, symbole):
+        """Identifiant entier d'une paire."""
+        return self.index.get_loc(symbole)
+
+    def ids_of(self, symboles):
+        """Identifiants d'une séquence de paires (-1 pour une paire inconnue)."""
+        return self.index.get_indexer(symboles)
+
+    def info(self, symbole):
+        """Métadonnées complètes d'une paire."""
+        return self.paires[self.id_of(symbole)]
+
+    def as_dict(self):
+        """Vue ``{symbole: métadonnées}`` utilisée par les dashboards."""
+        return {p['symbole']: dict(p) for p in self.paires}
+
+
+@lru_cache(maxsize=None)
+def load_registry(path=None):
+    """Registre chargé depuis ``path`` ou la configuration par défaut (mis en cache)."""
+    return CurrencyRegistry.from_config(path or os.environ.get('FOREX_CURRENCIES_CONFIG', DEFAULT_CONFIG))
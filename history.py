@@ -0,0 +1,177 @@
+# history.py
+"""Sources de données historiques : synthétique, Yahoo Finance ou fichier hors-ligne."""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+
+def generate_synthetic_history(registry, start='2020-01-01', end=None, seed=None):
+    """Génère l'historique simulé de Dashboard.py (une ligne par date et par paire)."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, end or datetime.now(), freq='D')
+    symboles = registry.symboles
+    n_dates, n_pairs = len(dates), len(symboles)
+
+    base = registry.prix_base
+    volatilite = registry.volatilite
+
+    # Simulation d'impact d'événements (bornes de tirage par date)
+    low = np.ones(n_dates)
+    high = np.ones(n_dates)
+    crise = (dates.year == 2020) & (dates.month <= 6)
+    low[crise], high[crise] = 0.9, 1.1
+    reprise = dates.year == 2021
+    low[reprise], high[reprise] = 1.05, 1.15
+    recent = dates.year >= 2023
+    low[recent], high[recent] = 0.98, 1.08
+    global_impact = low[:, None] + (high - low)[:, None] * rng.random((n_dates, n_pairs))
+
+    daily_volatility = rng.normal(1.0, volatilite / 100, size=(n_dates, n_pairs))
+    seasonal = 1 + 0.003 * np.sin(2 * np.pi * dates.dayofyear.to_numpy() / 365)
+    prix = base * global_impact * daily_volatility * seasonal[:, None]
+
+    return pd.DataFrame({
+        'date': np.repeat(dates.to_numpy(), n_pairs),
+        'symbole': np.tile(symboles, n_dates),
+        'nom': np.tile(registry.noms, n_dates),
+        'categorie': np.tile([p['categorie'] for p in registry.paires], n_dates),
+        'prix': prix.ravel(),
+        'volume': rng.uniform(100000, 5000000, size=n_dates * n_pairs),
+        'volatilite_jour': np.abs(daily_volatility - 1).ravel() * 100
+    })
+
+
+def download_yahoo_history(registry, period='2y', interval='1d'):
+    """Télécharge l'historique de clôture depuis Yahoo Finance (format de DashPro.py)."""
+    from yahoo_client import get_client
+
+    hist_data = get_client().history(registry.tickers, period=period, interval=interval)
+    hist_data = hist_data.reindex(columns=registry.tickers)
+    hist_data.columns = registry.symboles
+    hist_data.index.name = 'Date'
+
+    historical_data = hist_data.stack().dropna().rename('prix').reset_index()
+    historical_data.columns = ['Date', 'symbole', 'prix']
+    historical_data['nom'] = registry.noms[registry.ids_of(historical_data['symbole'])]
+    return historical_data.sort_values(['symbole', 'Date'], kind='stable').reset_index(drop=True)
+
+
+def load_history_file(path):
+    """Charge un historique hors-ligne (CSV, Parquet ou ``.npz`` compact) au format long date/symbole/prix."""
+    if str(path).endswith('.npz'):
+        return CompactHistory.load(path).frame()
+    if str(path).endswith('.parquet'):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path)
+    date_col = 'Date' if 'Date' in df.columns else 'date'
+    df[date_col] = pd.to_datetime(df[date_col])
+    return df
+
+
+def price_matrix(historical_data, registry=None):
+    """Convertit un historique long en matrice dates x paires.
+
+    Retourne ``(dates, symboles, prix)`` où ``prix`` est un tableau float64 de
+    forme (n_dates, n_paires). Les trous sont comblés par le dernier prix connu.
+    Avec un registre, la colonne ``i`` correspond à la paire d'identifiant ``i``.
+    """
+    date_col = 'Date' if 'Date' in historical_data.columns else 'date'
+    wide = historical_data.pivot_table(index=date_col, columns='symbole', values='prix', aggfunc='last')
+    if registry is not None:
+        wide = wide.reindex(columns=registry.symboles)
+    wide = wide.sort_index().ffill()
+    return wide.index.to_numpy(), list(wide.columns), wide.to_numpy(dtype=np.float64)
+
+
+def load_history(registry, source, history_path=None, seed=None):
+    """Charge l'historique demandé sous forme de matrice de prix (colonnes = identifiants)."""
+    if source == 'synthetic':
+        historical_data = generate_synthetic_history(registry, seed=seed)
+    elif source == 'yahoo':
+        historical_data = download_yahoo_history(registry)
+    else:
+        if not history_path:
+            raise ValueError("Un fichier d'historique est requis pour la source 'offline'")
+        historical_data = load_history_file(history_path)
+    dates, _, prix = price_matrix(historical_data, registry)
+    return dates, prix
+
+
+class CompactHistory:
+    """Historique intraday compact : timestamps epoch int64 (ns), identifiant de paire, prix float32.
+
+    Les lignes sont triées par paire puis par date, si bien que l'historique
+    d'une paire sur une période est une tranche contiguë obtenue par recherche
+    dichotomique, sans copie.
+    """
+
+    def __init__(self, symboles, timestamps, pair_ids, prix, presorted=False):
+        self.symboles = list(symboles)
+        self.index = pd.Index(self.symboles)
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)
+        self.pair_ids = np.asarray(pair_ids, dtype=np.int16)
+        self.prix = np.asarray(prix, dtype=np.float32)
+        if not presorted:
+            order = np.lexsort((self.timestamps, self.pair_ids))
+            self.timestamps = self.timestamps[order]
+            self.pair_ids = self.pair_ids[order]
+            self.prix = self.prix[order]
+        self.offsets = np.searchsorted(self.pair_ids, np.arange(len(self.symboles) + 1))
+
+    @classmethod
+    def from_series(cls, registry, series):
+        """Construit l'historique depuis ``{ticker: (timestamps_ns, prix)}`` (voir ``YahooClient.history_range``)."""
+        timestamps, pair_ids, prix = [], [], []
+        for pair_id, ticker in enumerate(registry.tickers):
+            ts, close = series.get(ticker, (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)))
+            timestamps.append(ts)
+            pair_ids.append(np.full(len(ts), pair_id, dtype=np.int16))
+            prix.append(close)
+        return cls(registry.symboles, np.concatenate(timestamps), np.concatenate(pair_ids), np.concatenate(prix))
+
+    @classmethod
+    def from_frame(cls, historical_data, registry):
+        """Construit l'historique depuis un DataFrame long (date, symbole, prix)."""
+        date_col = 'Date' if 'Date' in historical_data.columns else 'date'
+        pair_ids = registry.ids_of(historical_data['symbole'])
+        known = pair_ids >= 0
+        timestamps = pd.to_datetime(historical_data[date_col]).to_numpy(dtype='datetime64[ns]').view(np.int64)
+        return cls(registry.symboles, timestamps[known], pair_ids[known], historical_data['prix'].to_numpy()[known])
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def _slice(self, pair_id, start=None, end=None):
+        lo, hi = self.offsets[pair_id], self.offsets[pair_id + 1]
+        ts = self.timestamps[lo:hi]
+        a = 0 if start is None else np.searchsorted(ts, pd.Timestamp(start).value, side='left')
+        b = len(ts) if end is None else np.searchsorted(ts, pd.Timestamp(end).value, side='right')
+        return lo + a, lo + b
+
+    def pair(self, symbole, start=None, end=None):
+        """Timestamps (datetime64[ns]) et prix d'une paire, sous forme de vues."""
+        a, b = self._slice(self.index.get_loc(symbole), start, end)
+        return self.timestamps[a:b].view('datetime64[ns]'), self.prix[a:b]
+
+    def frame(self, symboles=None, start=None, end=None, date_col='Date'):
+        """Historique long (date, symbole, prix) des paires et de la période demandées."""
+        pair_ids = range(len(self.symboles)) if symboles is None else self.index.get_indexer(list(symboles))
+        slices = [self._slice(pair_id, start, end) for pair_id in pair_ids if pair_id >= 0]
+        rows = np.concatenate([np.arange(a, b) for a, b in slices]) if slices else np.empty(0, dtype=np.int64)
+        return pd.DataFrame({
+            date_col: self.timestamps[rows].view('datetime64[ns]'),
+            'symbole': np.array(self.symboles, dtype=object)[self.pair_ids[rows]],
+            'prix': self.prix[rows],
+        })
+
+    def save(self, path):
+        """Enregistre l'historique au format ``.npz`` (non compressé, lecture rapide)."""
+        np.savez(path, symboles=np.array(self.symboles), timestamps=self.timestamps,
+                 pair_ids=self.pair_ids, prix=self.prix)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['symboles'].tolist(), data['timestamps'], data['pair_ids'], data['prix'], presorted=True)
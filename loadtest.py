@@ -0,0 +1,346 @@
+# loadtest.py
+"""Test de charge multi-utilisateurs des dashboards Streamlit.
+
+Chaque utilisateur simulé est un client websocket sans navigateur
+(``HeadlessSession``) connecté à un vrai serveur ``streamlit run`` lancé en
+local : les sessions partagent les caches du processus serveur (registre,
+données de marché, statistiques...) comme en production. Chaque session
+parcourt les trois pages du menu et lance une simulation. Yahoo Finance est
+remplacé par un serveur HTTP local (``OfflineYahooServer``) qui sert un
+historique synthétique ou hors-ligne et compte les appels reçus.
+
+Le client websocket nécessite le paquet optionnel ``websockets``.
+
+    python loadtest.py --app DashPro.py --sessions 1 5 10 20 --iterations 2
+
+Pour chaque nombre de sessions simultanées, le rapport donne les latences p50
+et p95 d'une réexécution du script, la mémoire par session (RSS du serveur)
+et le nombre d'appels au fournisseur de données.
+"""
+import argparse
+import json
+import os
+import sys
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from urllib.request import urlopen
+
+import numpy as np
+import pandas as pd
+
+PAGES = ["Vue d'ensemble", "Analyse des prix", "Simulateur de trading"]
+
+# Profondeur des périodes ``range`` de l'API chart, en jours (None = tout l'historique)
+RANGES = {'1d': 1, '5d': 5, '1mo': 31, '3mo': 92, '6mo': 183, '1y': 365, '2y': 730, '5y': 1826, 'max': None}
+
+
+class OfflineYahooServer:
+    """Serveur HTTP local imitant l'API ``chart`` de Yahoo Finance à partir d'une matrice de prix."""
+
+    def __init__(self, registry, dates, prix, latency=0.0):
+        self.timestamps = np.asarray(dates, dtype='datetime64[s]').astype(np.int64)
+        self.prix = np.asarray(prix, dtype=np.float64)
+        self.columns = {ticker: i for i, ticker in enumerate(registry.tickers)}
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    def chart(self, ticker, params):
+        """Corps de la réponse ``/v8/finance/chart/<ticker>``."""
+        col = self.columns.get(ticker)
+        if col is None:
+            return {'chart': {'result': None, 'error': {'code': 'Not Found', 'description': ticker}}}
+        if 'period1' in params:
+            lo = np.searchsorted(self.timestamps, int(params['period1']), side='left')
+            hi = np.searchsorted(self.timestamps, int(params['period2']), side='right')
+        else:
+            days = RANGES.get(params.get('range', '1y'))
+            hi = len(self.timestamps)
+            lo = 0 if days is None else np.searchsorted(self.timestamps, self.timestamps[-1] - days * 86400, side='right')
+        close = self.prix[lo:hi, col]
+        last = self.prix[-1, col]
+        previous = self.prix[-2, col] if len(self.prix) > 1 else last
+        return {'chart': {'result': [{
+            'meta': {'symbol': ticker, 'regularMarketPrice': last, 'chartPreviousClose': previous},
+            'timestamp': self.timestamps[lo:hi].tolist(),
+            'indicators': {'quote': [{'close': np.where(np.isfinite(close), close, None).tolist()}]},
+        }], 'error': None}}
+
+    def start(self):
+        """Démarre le serveur sur un port libre et retourne son URL de base."""
+        provider = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with provider._lock:
+                    provider.calls += 1
+                if provider.latency:
+                    time.sleep(provider.latency)
+                url = urlparse(self.path)
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                body = json.dumps(provider.chart(url.path.rsplit('/', 1)[-1], params)).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self._server.serve_forever, name='offline-yahoo', daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+def free_port():
+    """Port TCP local libre."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def process_rss(pid):
+    """Mémoire résidente actuelle d'un processus (Linux), en octets."""
+    with open(f'/proc/{pid}/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+class StreamlitServer:
+    """Serveur ``streamlit run`` local et sans interface, lancé dans un sous-processus."""
+
+    def __init__(self, app_path, port, env=None):
+        self.app_path = app_path
+        self.port = port
+        self.env = dict(os.environ, **(env or {}))
+        self.process = None
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.port}/_stcore/stream"
+
+    def start(self, timeout=60.0):
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'streamlit', 'run', self.app_path,
+             '--server.headless', 'true', '--server.port', str(self.port),
+             '--server.fileWatcherType', 'none', '--browser.gatherUsageStats', 'false'],
+            env=self.env, cwd=os.path.dirname(self.app_path),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                with urlopen(f"http://127.0.0.1:{self.port}/_stcore/health", timeout=1) as response:
+                    if response.status == 200:
+                        return self
+            except OSError:
+                time.sleep(0.2)
+        self.stop()
+        raise RuntimeError(f"Le serveur Streamlit n'a pas démarré sur le port {self.port}")
+
+    def rss(self):
+        return process_rss(self.process.pid)
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait(timeout=30)
+
+
+class HeadlessSession:
+    """Client websocket minimal d'une session Streamlit (protocole BackMsg / ForwardMsg).
+
+    Comme le navigateur, le client renvoie à chaque exécution l'état de tous
+    les widgets qu'il a modifiés ; les boutons sont des déclencheurs ponctuels.
+    """
+
+    def __init__(self, url, timeout):
+        self.url = url
+        self.timeout = timeout
+        self.connection = None
+        self.widget_states = {}
+        self.elements = {}
+        self.exceptions = 0
+
+    def rerun(self, trigger=None):
+        """Relance le script et attend sa fin ; retourne la durée en secondes."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = ''
+        msg.rerun_script.widget_states.widgets.extend(self.widget_states.values())
+        if trigger is not None:
+            state = msg.rerun_script.widget_states.widgets.add()
+            state.id = trigger
+            state.trigger_value = True
+
+        self.elements = {}
+        started = time.perf_counter()
+        self.connection.send(msg.SerializeToString())
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(self.connection.recv(timeout=self.timeout))
+            kind = forward.WhichOneof('type')
+            if kind == 'delta' and forward.delta.WhichOneof('type') == 'new_element':
+                element = forward.delta.new_element
+                element_type = element.WhichOneof('type')
+                if element_type == 'exception':
+                    self.exceptions += 1
+                elif element_type in ('selectbox', 'button'):
+                    widget = getattr(element, element_type)
+                    self.elements[widget.label] = widget.id
+            elif kind == 'script_finished' and forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return time.perf_counter() - started
+
+    def select(self, label, value):
+        """Choisit ``value`` dans la liste déroulante ``label`` (prise en compte à la prochaine exécution)."""
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        widget_id = self.elements.get(label)
+        if widget_id is None:
+            return False
+        self.widget_states[widget_id] = WidgetState(id=widget_id, string_value=value)
+        return True
+
+    def __enter__(self):
+        from websockets.sync.client import connect
+
+        self.connection = connect(self.url, max_size=None, open_timeout=self.timeout, close_timeout=1).__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.connection.__exit__(*exc_info)
+
+
+def run_session(session, iterations):
+    """Une session utilisateur : chargement, puis ``iterations`` parcours des pages avec simulation.
+
+    Retourne ``(latences en secondes, nombre d'erreurs)``.
+    """
+    latencies = [session.rerun()]
+    errors = 0
+    for _ in range(iterations):
+        for page in PAGES:
+            if not session.select("Navigation", page):
+                errors += 1
+                break
+            latencies.append(session.rerun())
+            button = session.elements.get("Lancer la simulation")
+            if page == "Simulateur de trading" and button is not None:
+                latencies.append(session.rerun(trigger=button))
+    return latencies, errors + session.exceptions
+
+
+def measure(server, n_sessions, iterations, timeout, provider=None):
+    """Lance ``n_sessions`` sessions simultanées et retourne leurs mesures agrégées.
+
+    Une session d'échauffement, non mesurée, charge d'abord les modules et les
+    caches partagés du serveur : la mémoire par session ne compte que l'état
+    propre aux sessions. Les appels au fournisseur incluent ceux de
+    l'échauffement (téléchargements à froid).
+    """
+    calls_before = provider.calls if provider is not None else 0
+    with HeadlessSession(server.url, timeout) as session:
+        run_session(session, 1)
+    rss_before = server.rss()
+    started = time.perf_counter()
+    with ExitStack() as stack:
+        sessions = [stack.enter_context(HeadlessSession(server.url, timeout)) for _ in range(n_sessions)]
+        with ThreadPoolExecutor(max_workers=n_sessions) as executor:
+            results = list(executor.map(lambda session: run_session(session, iterations), sessions))
+        elapsed = time.perf_counter() - started
+        # Sessions encore ouvertes : leur état compte dans le RSS du serveur
+        rss_after = server.rss()
+
+    latencies = np.concatenate([np.asarray(r[0]) for r in results]) * 1000
+    return {
+        'sessions': n_sessions,
+        'reruns': latencies.size,
+        'p50_ms': np.percentile(latencies, 50),
+        'p95_ms': np.percentile(latencies, 95),
+        'max_ms': latencies.max(),
+        'reruns_par_s': latencies.size / elapsed,
+        'memoire_par_session_mo': (rss_after - rss_before) / n_sessions / 2**20,
+        'appels_fournisseur': (provider.calls - calls_before) if provider is not None else 0,
+        'erreurs': sum(r[1] for r in results),
+    }
+
+
+def main(argv=None):
+    from currencies import load_registry
+    from history import load_history
+
+    parser = argparse.ArgumentParser(description="Test de charge multi-sessions des dashboards Streamlit")
+    parser.add_argument('--app', default='DashPro.py', help="Script Streamlit à tester (Dashboard.py ou DashPro.py)")
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 5, 10, 20],
+                        help="Nombres de sessions simultanées à tester, dans l'ordre")
+    parser.add_argument('--iterations', type=int, default=1, help="Parcours des trois pages par session")
+    parser.add_argument('--source', choices=['synthetic', 'offline'], default='synthetic',
+                        help="Historique servi par le fournisseur hors-ligne")
+    parser.add_argument('--history', help="Historique hors-ligne (.csv, .parquet ou .npz) pour --source offline")
+    parser.add_argument('--currencies', help="Configuration des paires (JSON), par défaut currencies.json")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.05, help="Latence simulée du fournisseur (secondes)")
+    parser.add_argument('--rate-limit', type=float, default=50.0, help="Requêtes/s autorisées vers le fournisseur")
+    parser.add_argument('--timeout', type=float, default=120.0, help="Durée maximale d'une réexécution (secondes)")
+    parser.add_argument('--port', type=int, help="Port du serveur Streamlit (libre au hasard par défaut)")
+    parser.add_argument('-o', '--output', help="Rapport CSV ; affiché sur la sortie standard sinon")
+    args = parser.parse_args(argv)
+    if args.source == 'offline' and not args.history:
+        parser.error("--history est requis avec --source offline")
+
+    app_path = os.path.abspath(args.app)
+    registry = load_registry(args.currencies)
+    dates, prix = load_history(registry, args.source, args.history, args.seed)
+    provider = OfflineYahooServer(registry, dates, prix, latency=args.latency)
+
+    # Configuration lue par les dashboards à l'import de leurs modules
+    env = {
+        'YAHOO_BASE_URL': provider.start(),
+        'YAHOO_RATE_LIMIT': str(args.rate_limit),
+        'FOREX_AUTO_REFRESH': '0',
+        'FOREX_SEED': str(args.seed),
+    }
+    if args.currencies:
+        env['FOREX_CURRENCIES_CONFIG'] = os.path.abspath(args.currencies)
+
+    rows = []
+    try:
+        with tempfile.TemporaryDirectory(prefix='forex-loadtest-') as tmp_dir:
+            # Aucun instantané : chaque session part de l'historique de la graine
+            env['FOREX_SNAPSHOT'] = os.path.join(tmp_dir, 'absent.npz')
+            for n_sessions in args.sessions:
+                # Un serveur neuf par palier : caches froids et mémoire comparable
+                server = StreamlitServer(app_path, args.port or free_port(), env).start()
+                try:
+                    rows.append(measure(server, n_sessions, args.iterations, args.timeout, provider))
+                finally:
+                    server.stop()
+                print(f"{n_sessions} session(s) : p50 {rows[-1]['p50_ms']:.0f} ms, p95 {rows[-1]['p95_ms']:.0f} ms",
+                      file=sys.stderr)
+    finally:
+        provider.stop()
+
+    report = pd.DataFrame(rows)
+    if args.output:
+        report.to_csv(args.output, index=False)
+    else:
+        print(report.to_string(index=False, float_format=lambda x: f"{x:.1f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# market_data.py
+"""Données de marché partagées par toutes les sessions Streamlit du processus.
+
+Chaque type de donnée (historique, cotations) est servi depuis un cache
+commun : les rafraîchissements simultanés partagent un seul appel à Yahoo
+Finance et ne sont pas relancés avant l'intervalle minimal du type. Les
+historiques sont de plus rafraîchis d'eux-mêmes au-delà de leur âge maximal.
+"""
+import os
+import threading
+import time
+
+from history import CompactHistory
+from throttling import Refresher
+from yahoo_client import INTRADAY_LIMITS, get_client
+
+HISTORY_MIN_INTERVAL = float(os.environ.get('FOREX_HISTORY_MIN_INTERVAL', 900))
+# Âge maximal de l'historique servi sans rafraîchissement explicite
+HISTORY_MAX_AGE = float(os.environ.get('FOREX_HISTORY_MAX_AGE', HISTORY_MIN_INTERVAL))
+QUOTES_MIN_INTERVAL = float(os.environ.get('FOREX_QUOTES_MIN_INTERVAL', 30))
+
+_refreshers = {}
+_lock = threading.Lock()
+
+
+def _refresher(key, fetch, min_interval, max_age=None):
+    with _lock:
+        refresher = _refreshers.get(key)
+        if refresher is None:
+            refresher = _refreshers[key] = Refresher(fetch, min_interval, max_age)
+        return refresher
+
+
+def history(tickers, period='2y', interval='1d', force=False):
+    """Clôtures historiques (une colonne par ticker) et heure du dernier téléchargement.
+
+    Le DataFrame retourné est partagé entre sessions et ne doit pas être modifié.
+    """
+    tickers = tuple(tickers)
+    refresher = _refresher(
+        ('history', tickers, period, interval),
+        lambda: get_client().history(tickers, period=period, interval=interval),
+        HISTORY_MIN_INTERVAL, HISTORY_MAX_AGE,
+    )
+    return refresher.get(force)
+
+
+def quotes(tickers, force=False):
+    """Cotations actuelles ``{ticker: {...}}`` et heure de la dernière récupération."""
+    tickers = tuple(tickers)
+    refresher = _refresher(('quotes', tickers), lambda: get_client().quotes(tickers), QUOTES_MIN_INTERVAL)
+    return refresher.get(force)
+
+
+def intraday_history(registry, interval, force=False):
+    """Historique intraday compact sur toute la profondeur autorisée pour ``interval``."""
+    lookback_days = INTRADAY_LIMITS[interval][1]
+
+    def fetch():
+        end = int(time.time())
+        # Marge d'une heure pour rester dans la profondeur acceptée par Yahoo
+        start = end - lookback_days * 86400 + 3600
+        return CompactHistory.from_series(registry, get_client().history_range(registry.tickers, start, end, interval))
+
+    refresher = _refresher(('intraday', tuple(registry.tickers), interval), fetch, HISTORY_MIN_INTERVAL, HISTORY_MAX_AGE)
+    return refresher.get(force)
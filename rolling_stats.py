@@ -0,0 +1,198 @@
+# rolling_stats.py
+"""Statistiques glissantes par paire : volatilité réalisée, mouvement moyen, drawdown, distribution.
+
+Les statistiques sont calculées une fois sur les dernières barres de
+l'historique (opérations vectorisées), puis mises à jour barre par barre :
+chaque nouvelle clôture ne coûte que quelques opérations par paire. Les
+dashboards les lisent via ``cached_statistics``, partagé par les sessions du
+processus, au lieu de les recalculer à chaque affichage.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Fenêtres de volatilité réalisée, mouvement moyen et distribution (en barres)
+VOL_WINDOWS = (20, 60, 250)
+MOVE_WINDOW = 14
+DIST_WINDOW = 250
+CACHE_SIZE = 32
+
+
+class RollingStatistics:
+    """Statistiques d'une matrice de clôtures (n_dates, n_paires), extensible barre par barre."""
+
+    def __init__(self, dates, prix, pip_size):
+        dates = np.asarray(dates, dtype='datetime64[ns]')
+        prix = np.asarray(prix, dtype=np.float64)
+        self.pip_size = np.asarray(pip_size, dtype=np.float64)
+        self.first_date = dates[0] if len(dates) else None
+        self.last_date = dates[-1] if len(dates) else None
+        self.version = None
+        n_pairs = prix.shape[1]
+
+        returns = np.nan_to_num(np.diff(np.log(prix), axis=0))
+        moves = np.nan_to_num(np.abs(np.diff(prix, axis=0)))
+        self.count = returns.shape[0]
+
+        # Sommes courantes des fenêtres : toutes les barres disponibles tant
+        # qu'une fenêtre est incomplète, car ``update`` en retirera chacune
+        self.sum = {w: returns[max(self.count - w, 0):].sum(axis=0) for w in VOL_WINDOWS}
+        self.sum_sq = {w: (returns[max(self.count - w, 0):] ** 2).sum(axis=0) for w in VOL_WINDOWS}
+        self.moves_sum = moves[max(self.count - MOVE_WINDOW, 0):].sum(axis=0)
+
+        # Tampons circulaires des dernières barres, pour retirer celles qui sortent des fenêtres
+        self.size = max(max(VOL_WINDOWS), DIST_WINDOW, MOVE_WINDOW)
+        self.returns = np.zeros((self.size, n_pairs))
+        self.moves = np.zeros((self.size, n_pairs))
+        tail = min(self.count, self.size)
+        self.pos = tail % self.size
+        if tail:
+            self.returns[:tail] = returns[-tail:]
+            self.moves[:tail] = moves[-tail:]
+
+        running_peak = np.fmax.accumulate(prix, axis=0) if len(prix) else np.full((1, n_pairs), np.nan)
+        self.peak = running_peak[-1]
+        self.last_prix = prix[-1] if len(prix) else np.full(n_pairs, np.nan)
+        self.max_drawdown = np.fmin.reduce(prix / running_peak - 1, axis=0) if len(prix) else np.zeros(n_pairs)
+        self._latest = None
+
+    def update(self, date, prix):
+        """Ajoute une barre (clôture de chaque paire) et met à jour les statistiques."""
+        prix = np.where(np.isfinite(prix), prix, self.last_prix)
+        r = np.nan_to_num(np.log(prix / self.last_prix))
+        move = np.nan_to_num(np.abs(prix - self.last_prix))
+
+        for w in VOL_WINDOWS:
+            leaving = self.returns[(self.pos - w) % self.size] if self.count >= w else 0.0
+            self.sum[w] += r - leaving
+            self.sum_sq[w] += r ** 2 - leaving ** 2
+        leaving = self.moves[(self.pos - MOVE_WINDOW) % self.size] if self.count >= MOVE_WINDOW else 0.0
+        self.moves_sum += move - leaving
+
+        self.returns[self.pos] = r
+        self.moves[self.pos] = move
+        self.pos = (self.pos + 1) % self.size
+        self.count += 1
+
+        self.peak = np.fmax(self.peak, prix)
+        self.max_drawdown = np.fmin(self.max_drawdown, prix / self.peak - 1)
+        self.last_prix = prix
+        self.last_date = np.datetime64(pd.Timestamp(date), 'ns')
+        self._latest = None
+
+    def extend(self, dates, prix):
+        """Ajoute les barres postérieures à la dernière date connue."""
+        dates = np.asarray(dates, dtype='datetime64[ns]')
+        new = dates > self.last_date if self.last_date is not None else np.ones(len(dates), dtype=bool)
+        for date, row in zip(dates[new], np.asarray(prix, dtype=np.float64)[new]):
+            self.update(date, row)
+        return int(new.sum())
+
+    def last_bar_unchanged(self, dates, prix):
+        """Indique si la dernière barre intégrée figure inchangée dans ``(dates, prix)``.
+
+        Une barre révisée (clôture du jour encore en cours) ne peut pas être
+        retirée des fenêtres ni du drawdown : il faut alors tout recalculer.
+        """
+        if self.last_date is None:
+            return True
+        dates = np.asarray(dates, dtype='datetime64[ns]')
+        pos = np.searchsorted(dates, self.last_date)
+        if pos == len(dates) or dates[pos] != self.last_date:
+            return False
+        row = np.asarray(prix, dtype=np.float64)[pos]
+        # Les prix manquants ont été remplacés par le dernier prix connu
+        finite = np.isfinite(row)
+        return bool(np.array_equal(row[finite], self.last_prix[finite]))
+
+    def _window(self, w):
+        """Rendements des ``w`` dernières barres, du plus ancien au plus récent."""
+        n = min(w, self.count, self.size)
+        return self.returns[(self.pos - n + np.arange(n)) % self.size]
+
+    def latest(self):
+        """Statistiques courantes, une ligne par paire (indexées par identifiant)."""
+        if self._latest is None:
+            stats = {}
+            for w in VOL_WINDOWS:
+                n = w if self.count >= w else 0
+                var = (self.sum_sq[w] - self.sum[w] ** 2 / n) / (n - 1) if n > 1 else np.full_like(self.sum[w], np.nan)
+                stats[f'vol_{w}'] = np.sqrt(np.maximum(var, 0)) * 100
+            n = MOVE_WINDOW if self.count >= MOVE_WINDOW else 0
+            # Variation absolue moyenne de clôture à clôture (pas un range haut-bas)
+            stats['mouvement_moyen_pips'] = self.moves_sum / n / self.pip_size if n else np.full_like(self.moves_sum, np.nan)
+            stats['drawdown_pct'] = (self.last_prix / self.peak - 1) * 100
+            stats['max_drawdown_pct'] = self.max_drawdown * 100
+
+            window = self._window(DIST_WINDOW)
+            mean = window.mean(axis=0) if len(window) else np.full_like(self.peak, np.nan)
+            std = window.std(axis=0) if len(window) else np.full_like(self.peak, np.nan)
+            centered = (window - mean) / np.where(std > 0, std, np.nan)
+            stats['rendement_moyen_pct'] = mean * 100
+            stats['skewness'] = (centered ** 3).mean(axis=0) if len(window) else mean
+            stats['kurtosis'] = (centered ** 4).mean(axis=0) - 3 if len(window) else mean
+            stats['var_95_pct'] = -np.quantile(window, 0.05, axis=0) * 100 if len(window) else mean
+            self._latest = pd.DataFrame(stats)
+            # Paire sans aucun prix (absente de l'historique) : pas de statistiques
+            self._latest.loc[~np.isfinite(self.peak)] = np.nan
+        return self._latest
+
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def cached_statistics(key, load, registry, version=None):
+    """Statistiques de l'historique ``key``, partagées par les sessions du processus.
+
+    ``load()`` retourne ``(dates, prix)`` avec les colonnes dans l'ordre du
+    registre ; il n'est appelé que si l'historique n'est pas en cache ou si
+    ``version`` a changé. Les barres ajoutées depuis le dernier calcul sont
+    intégrées de façon incrémentale ; un historique réécrit (première date
+    différente ou dernière barre révisée) est recalculé entièrement.
+
+    Retourne un DataFrame indexé par symbole.
+    """
+    with _lock:
+        stats = _cache.pop(key, None)
+        if stats is None or stats.version != version:
+            dates, prix = load()
+            dates = np.asarray(dates, dtype='datetime64[ns]')
+            if (stats is None or not len(dates) or stats.first_date != dates[0]
+                    or not stats.last_bar_unchanged(dates, prix)):
+                stats = RollingStatistics(dates, prix, registry.pip_size)
+            else:
+                stats.extend(dates, prix)
+            stats.version = version
+        _cache[key] = stats
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+        return stats.latest().set_axis(registry.symboles)
+
+
+def format_value(value, spec, unit=''):
+    """Valeur formatée selon ``spec`` suivie de ``unit``, ou « n/d » si elle n'est pas disponible (historique trop court)."""
+    return f"{value:{spec}}{unit}" if np.isfinite(value) else "n/d"
+
+
+def card_statistics(stats, volatilite):
+    """Lignes HTML des cartes de paires : volatilité, mouvement moyen et drawdown."""
+    return (
+        f"📈 Volatilité 20j: {format_value(volatilite, '.2f', '%')} · "
+        f"Mvt moyen: {format_value(stats['mouvement_moyen_pips'], '.0f', ' pips')}<br>"
+        f"📉 Drawdown: {format_value(stats['drawdown_pct'], '.1f', '%')} "
+        f"(max {format_value(stats['max_drawdown_pct'], '.1f', '%')})"
+    )
+
+
+def statistics_caption(stats):
+    """Légende des statistiques glissantes d'une paire sous le simulateur."""
+    vols = ' / '.join(format_value(stats[f'vol_{w}'], '.2f', '%') for w in VOL_WINDOWS)
+    return (
+        f"Volatilité réalisée {' / '.join(f'{w}j' for w in VOL_WINDOWS)} : {vols} · "
+        f"Mouvement moyen ({MOVE_WINDOW}j, clôture à clôture) : {format_value(stats['mouvement_moyen_pips'], '.0f', ' pips')} · "
+        f"VaR 95% : {format_value(stats['var_95_pct'], '.2f', '%')} · "
+        f"Drawdown max : {format_value(stats['max_drawdown_pct'], '.1f', '%')}"
+    )
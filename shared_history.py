@@ -0,0 +1,184 @@
+# shared_history.py
+"""Historique partagé entre plusieurs processus Streamlit via un fichier mappé en mémoire.
+
+Un processus chargeur publie la matrice de prix (dates x paires) :
+
+    python shared_history.py --path /dev/shm/forex_history.bin --source yahoo --interval 3600
+
+et chaque worker lancé avec ``FOREX_SHARED_HISTORY=/dev/shm/forex_history.bin``
+s'y attache sans copie. Le fichier est remplacé atomiquement à chaque
+publication ; les workers comparent la version de l'en-tête et ne remappent
+le fichier que lorsqu'elle change.
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from currencies import load_registry
+from history import load_history
+
+MAGIC = b'FXHIST01'
+# magic, version, n_dates, n_paires, taille du bloc symboles
+HEADER = struct.Struct('<8sQQQQ')
+HEADER_SIZE = 64
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+class HistoryMatrix:
+    """Vue en lecture seule d'une version publiée de l'historique."""
+
+    def __init__(self, version, dates, symboles, prix):
+        self.version = version
+        self.dates = dates
+        self.symboles = symboles
+        self.index = pd.Index(symboles)
+        self.prix = prix
+
+    def frame(self, symboles=None, start=None, end=None, date_col='date'):
+        """Historique long (date, symbole, prix) limité aux paires et dates demandées.
+
+        Seul le sous-ensemble demandé est copié ; la matrice reste partagée.
+        """
+        cols = np.arange(len(self.symboles)) if symboles is None else self.index.get_indexer(list(symboles))
+        cols = cols[cols >= 0]
+        lo = 0 if start is None else np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start), 'ns'), side='left')
+        hi = len(self.dates) if end is None else np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end), 'ns'), side='right')
+        block = self.prix[lo:hi, cols]
+        n_dates = block.shape[0]
+
+        df = pd.DataFrame({
+            date_col: np.tile(self.dates[lo:hi], len(cols)),
+            'symbole': np.repeat(np.array(self.symboles, dtype=object)[cols], n_dates),
+            'prix': block.T.ravel(),
+        })
+        return df[df['prix'].notna()].reset_index(drop=True)
+
+    def matrix(self, symboles):
+        """Matrice dates x paires dans l'ordre de ``symboles`` (colonne NaN pour une paire absente)."""
+        cols = self.index.get_indexer(list(symboles))
+        block = self.prix[:, np.maximum(cols, 0)]
+        block[:, cols < 0] = np.nan
+        return block
+
+    def last_prices(self, symboles):
+        """Dernier prix connu de chaque paire (NaN pour une paire absente)."""
+        cols = self.index.get_indexer(list(symboles))
+        last = self.prix[-1, np.maximum(cols, 0)] if len(self.dates) else np.full(len(cols), np.nan)
+        return np.where(cols >= 0, last, np.nan)
+
+
+def publish_history(path, dates, symboles, prix, version=None):
+    """Écrit une nouvelle version de l'historique puis remplace ``path`` atomiquement."""
+    version = version or time.time_ns()
+    dates = np.ascontiguousarray(np.asarray(dates, dtype='datetime64[ns]'))
+    prix = np.ascontiguousarray(prix, dtype=np.float64)
+    n_dates, n_pairs = prix.shape
+    symbols_blob = json.dumps(list(symboles)).encode('utf-8')
+
+    dates_offset = _align(HEADER_SIZE + len(symbols_blob))
+    prix_offset = dates_offset + dates.nbytes
+    total = prix_offset + prix.nbytes
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.truncate(total)
+    raw = np.memmap(tmp_path, dtype=np.uint8, mode='r+', shape=(total,))
+    raw[:HEADER.size] = np.frombuffer(HEADER.pack(MAGIC, version, n_dates, n_pairs, len(symbols_blob)), dtype=np.uint8)
+    raw[HEADER_SIZE:HEADER_SIZE + len(symbols_blob)] = np.frombuffer(symbols_blob, dtype=np.uint8)
+    raw[dates_offset:prix_offset] = dates.view(np.uint8)
+    raw[prix_offset:total] = prix.reshape(-1).view(np.uint8)
+    raw.flush()
+    del raw
+    os.replace(tmp_path, path)
+    return version
+
+
+def _read_version(path):
+    with open(path, 'rb') as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError(f"{path} est tronqué")
+    magic, version, *_ = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError(f"{path} n'est pas un historique partagé")
+    return version
+
+
+class SharedHistory:
+    """Lecteur d'un historique publié, partagé par toutes les sessions d'un processus."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._current = None
+
+    def _map(self):
+        raw = np.memmap(self.path, dtype=np.uint8, mode='r')
+        if raw.size < HEADER.size:
+            raise ValueError(f"{self.path} est tronqué")
+        magic, version, n_dates, n_pairs, symbols_len = HEADER.unpack(raw[:HEADER.size].tobytes())
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} n'est pas un historique partagé")
+        symboles = json.loads(raw[HEADER_SIZE:HEADER_SIZE + symbols_len].tobytes().decode('utf-8'))
+        dates_offset = _align(HEADER_SIZE + symbols_len)
+        prix_offset = dates_offset + 8 * n_dates
+        if raw.size < prix_offset + 8 * n_dates * n_pairs:
+            raise ValueError(f"{self.path} est tronqué")
+        dates = np.ndarray((n_dates,), dtype='datetime64[ns]', buffer=raw, offset=dates_offset)
+        prix = np.ndarray((n_dates, n_pairs), dtype=np.float64, buffer=raw, offset=prix_offset)
+        return HistoryMatrix(version, dates, symboles, prix)
+
+    def current(self):
+        """Version courante, remappée uniquement si l'en-tête annonce une nouvelle version.
+
+        Lève ``OSError`` si le fichier n'est pas (encore) publié et ``ValueError``
+        s'il n'est pas un historique partagé valide.
+        """
+        with self._lock:
+            if self._current is None or _read_version(self.path) != self._current.version:
+                self._current = self._map()
+            return self._current
+
+
+@lru_cache(maxsize=None)
+def attach_shared_history(path):
+    """Lecteur unique par processus pour ``path``."""
+    return SharedHistory(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publie l'historique des prix en mémoire partagée")
+    parser.add_argument('--path', default=os.environ.get('FOREX_SHARED_HISTORY', '/dev/shm/forex_history.bin'))
+    parser.add_argument('--source', choices=['synthetic', 'yahoo', 'offline'], default='yahoo')
+    parser.add_argument('--history', help="Historique hors-ligne (.csv ou .parquet) pour --source offline")
+    parser.add_argument('--currencies', help="Configuration des paires (JSON), par défaut currencies.json")
+    parser.add_argument('--seed', type=int, default=None, help="Graine de l'historique synthétique")
+    parser.add_argument('--interval', type=float, default=0, help="Republier toutes les N secondes (0 = une seule fois)")
+    args = parser.parse_args(argv)
+    if args.source == 'offline' and not args.history:
+        parser.error("--history est requis avec --source offline")
+
+    registry = load_registry(args.currencies)
+    while True:
+        dates, prix = load_history(registry, args.source, args.history, args.seed)
+        version = publish_history(args.path, dates, registry.symboles, prix)
+        print(f"Historique publié : {prix.shape[0]} dates x {prix.shape[1]} paires (version {version}) -> {args.path}",
+              file=sys.stderr)
+        if args.interval <= 0:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
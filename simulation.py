@@ -0,0 +1,184 @@
+# simulation.py
+"""Moteur de simulation de trading vectorisé (Stop Loss / Take Profit)."""
+import numpy as np
+
+STATUT_INVALIDE = -1
+STATUT_SORTIE = 0
+STATUT_STOP_LOSS = 1
+STATUT_TAKE_PROFIT = 2
+
+# Nombre maximal de cellules (scénarios x jours) matérialisées par lot
+MAX_CELLULES = 4_000_000
+
+
+def trade_costs(entry_price, is_long, held_days, notional, pip_size, costs):
+    """Frais de transaction en euros, calculés par tableaux.
+
+    ``costs`` est un dict dont toutes les clés sont optionnelles (scalaires ou
+    tableaux par scénario) :
+
+    - ``spread_pips`` : écart bid/ask payé sur l'aller-retour ;
+    - ``commission_pct`` : commission par exécution, en % du nominal ;
+    - ``swap_long_pct`` / ``swap_short_pct`` : coût de portage par jour détenu,
+      en % du nominal (négatif pour un swap perçu) ;
+    - ``slippage`` et ``volatilite`` : glissement par exécution, égal à
+      ``slippage`` fois la volatilité journalière (en %).
+    """
+    def param(key):
+        return np.asarray(costs.get(key, 0.0), dtype=np.float64)
+
+    spread = notional * param('spread_pips') * np.asarray(pip_size, dtype=np.float64) / entry_price
+    slippage = notional * 2 * param('slippage') * param('volatilite') / 100
+    commission = notional * 2 * param('commission_pct') / 100
+    swap_pct = np.where(is_long, param('swap_long_pct'), param('swap_short_pct'))
+    swap = notional * held_days * swap_pct / 100
+    return {
+        'cost_spread': spread,
+        'cost_slippage': slippage,
+        'cost_commission': commission,
+        'cost_swap': swap,
+        'costs': spread + slippage + commission + swap,
+    }
+
+
+def simulate_trades(prix, pair_idx, entry_idx, exit_idx, is_long, stop_loss_pct,
+                    take_profit_pct, leverage, investment, pip_size, costs=None, dates=None):
+    """Simule un lot de positions sur une matrice de prix (n_dates, n_paires).
+
+    Chaque scénario entre au prix de ``entry_idx`` et sort au premier Stop Loss
+    ou Take Profit touché après l'entrée (le Stop Loss est testé en premier),
+    sinon au prix de ``exit_idx``. Tous les paramètres sont des tableaux de même
+    longueur (ou des scalaires). Retourne un dict de tableaux.
+
+    Avec ``costs`` (voir ``trade_costs``), ``profit_loss`` et ``roi`` sont nets
+    de frais ; la durée de détention vient de ``dates`` ou, à défaut, d'un jour
+    par point de la série.
+    """
+    prix = np.asarray(prix, dtype=np.float64)
+    pair_idx, entry_idx, exit_idx = np.broadcast_arrays(
+        np.asarray(pair_idx, dtype=np.int64),
+        np.asarray(entry_idx, dtype=np.int64),
+        np.asarray(exit_idx, dtype=np.int64),
+    )
+    n = pair_idx.shape[0]
+    sign = np.where(np.broadcast_to(is_long, n), 1.0, -1.0)
+    stop_loss_pct = np.broadcast_to(np.asarray(stop_loss_pct, dtype=np.float64), n)
+    take_profit_pct = np.broadcast_to(np.asarray(take_profit_pct, dtype=np.float64), n)
+
+    valid = (entry_idx >= 0) & (exit_idx >= entry_idx) & (exit_idx < prix.shape[0])
+    length = np.where(valid, exit_idx - entry_idx + 1, 1)
+
+    entry_price = np.full(n, np.nan)
+    exit_price = np.full(n, np.nan)
+    exit_pos = np.where(valid, exit_idx, -1)
+    statut = np.where(valid, STATUT_SORTIE, STATUT_INVALIDE)
+
+    # Regrouper les scénarios de durée proche pour limiter le remplissage
+    order = np.argsort(length, kind='stable')
+    start = 0
+    while start < n:
+        stop = min(n, start + max(1, MAX_CELLULES // int(length[order[start]])))
+        window = int(length[order[stop - 1]])
+        stop = min(stop, start + max(1, MAX_CELLULES // window))
+        rows = order[start:stop]
+        rows = rows[valid[rows]]
+        start = stop
+        if rows.size == 0:
+            continue
+
+        offsets = np.arange(window)
+        first = entry_idx[rows]
+        last = exit_idx[rows]
+        idx = np.minimum(first[:, None] + offsets[None, :], last[:, None])
+        path = prix[idx, pair_idx[rows][:, None]]
+        entry = path[:, 0]
+        s = sign[rows][:, None]
+
+        stop_level = entry * (1 - sign[rows] * stop_loss_pct[rows] / 100)
+        take_level = entry * (1 + sign[rows] * take_profit_pct[rows] / 100)
+        in_window = offsets[None, :] <= (last - first)[:, None]
+        in_window[:, 0] = False
+        sl_hit = (s * path <= s * stop_level[:, None]) & in_window
+        tp_hit = (s * path >= s * take_level[:, None]) & in_window
+
+        hit = sl_hit | tp_hit
+        triggered = hit.any(axis=1)
+        first_hit = np.argmax(hit, axis=1)
+        k = np.arange(rows.size)
+        sl_first = sl_hit[k, first_hit]
+
+        pos = np.where(triggered, first_hit, last - first)
+        entry_price[rows] = entry
+        exit_price[rows] = path[k, pos]
+        exit_pos[rows] = first + pos
+        statut[rows] = np.where(triggered, np.where(sl_first, STATUT_STOP_LOSS, STATUT_TAKE_PROFIT), STATUT_SORTIE)
+
+    price_change_pct = sign * (exit_price - entry_price) / entry_price * 100
+    leveraged_investment = np.broadcast_to(
+        np.asarray(investment, dtype=np.float64) * np.asarray(leverage, dtype=np.float64), n
+    ).copy()
+    profit_loss = leveraged_investment * price_change_pct / 100
+
+    result = {
+        'entry_price': entry_price,
+        'exit_price': exit_price,
+        'exit_idx': exit_pos,
+        'statut': statut,
+        'pip_change': sign * (exit_price - entry_price) / np.asarray(pip_size, dtype=np.float64),
+        'price_change_pct': price_change_pct,
+        'leveraged_investment': leveraged_investment,
+    }
+    if costs is not None:
+        if dates is not None:
+            dates = np.asarray(dates)
+            held = dates[np.maximum(exit_pos, 0)] - dates[np.clip(entry_idx, 0, len(dates) - 1)]
+            held_days = held / np.timedelta64(1, 'D')
+        else:
+            held_days = (exit_pos - entry_idx).astype(np.float64)
+        result.update(trade_costs(entry_price, sign > 0, held_days, leveraged_investment, pip_size, costs))
+        result['gross_profit_loss'] = profit_loss
+        profit_loss = profit_loss - result['costs']
+
+    result['profit_loss'] = profit_loss
+    result['roi'] = profit_loss / np.asarray(investment, dtype=np.float64) * 100
+    return result
+
+
+def simulate_trade(prix, is_long, stop_loss_pct, take_profit_pct, leverage, investment, pip_size,
+                   costs=None, dates=None):
+    """Simule une seule position sur une série de prix (entrée au premier point)."""
+    prix = np.asarray(prix, dtype=np.float64)
+    result = simulate_trades(prix[:, None], [0], [0], [len(prix) - 1], is_long,
+                             stop_loss_pct, take_profit_pct, leverage, investment, pip_size,
+                             costs=costs, dates=dates)
+    return {key: value[0].item() for key, value in result.items()}
+
+
+def render_cost_inputs(spread_pips, volatilite):
+    """Paramètres des frais de transaction saisis dans un dashboard Streamlit (dict ``costs``).
+
+    ``spread_pips`` est le spread proposé par défaut, ``volatilite`` la
+    volatilité journalière (%) utilisée pour le slippage.
+    """
+    import streamlit as st
+
+    with st.expander("Frais de transaction"):
+        col_a, col_b = st.columns(2)
+        with col_a:
+            spread_pips = st.number_input("Spread (pips):", min_value=0.0, max_value=50.0,
+                                          value=float(spread_pips), step=0.1)
+            commission_pct = st.number_input("Commission par exécution (%):", min_value=0.0, max_value=1.0,
+                                             value=0.0, step=0.005, format="%.3f")
+        with col_b:
+            swap_pct = st.number_input("Swap par nuit (% du nominal):", min_value=-1.0, max_value=1.0,
+                                       value=0.0, step=0.001, format="%.3f")
+            slippage = st.number_input("Slippage (x volatilité journalière):", min_value=0.0, max_value=1.0,
+                                       value=0.0, step=0.01)
+    return {
+        'spread_pips': spread_pips,
+        'commission_pct': commission_pct,
+        'swap_long_pct': swap_pct,
+        'swap_short_pct': swap_pct,
+        'slippage': slippage,
+        'volatilite': volatilite,
+    }
@@ -0,0 +1,85 @@
+# snapshot.py
+"""Instantanés de l'état d'un dashboard, au format colonnaire compressé.
+
+Un instantané est une archive ``.npz`` compressée : chaque colonne de chaque
+table est un tableau numpy (les colonnes texte sont encodées par dictionnaire :
+codes entiers et valeurs distinctes) et les métadonnées (graine, état du
+générateur aléatoire, ordre des colonnes...) sont stockées en JSON.
+Aucun objet Python n'est sérialisé : la lecture n'exécute pas de pickle.
+"""
+import io
+import json
+import os
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+SNAPSHOT_VERSION = 1
+
+
+def _encode_column(arrays, key, values):
+    values = np.asarray(values)
+    if values.dtype == object:
+        codes, uniques = pd.factorize(values)
+        arrays[key] = codes.astype(np.int32)
+        arrays[f"{key}.valeurs"] = np.asarray(uniques, dtype=object).astype(str)
+    else:
+        arrays[key] = values
+
+
+def _decode_column(data, key):
+    if f"{key}.valeurs" in data:
+        return data[f"{key}.valeurs"].astype(object)[data[key]]
+    return data[key]
+
+
+def save_snapshot(target, meta, tables):
+    """Écrit un instantané ``meta`` + ``{nom: DataFrame}`` dans un fichier ou un flux.
+
+    L'écriture dans un fichier passe par un fichier temporaire remplacé
+    atomiquement, comme ``publish_history``.
+    """
+    meta = dict(meta, version=SNAPSHOT_VERSION, created_at=datetime.now().isoformat(timespec='seconds'),
+                tables={name: list(df.columns) for name, df in tables.items()})
+    arrays = {'meta': np.array(json.dumps(meta))}
+    for name, df in tables.items():
+        for i, col in enumerate(df.columns):
+            _encode_column(arrays, f"{name}.{i}", df[col].to_numpy())
+
+    if isinstance(target, (str, os.PathLike)):
+        tmp_path = f"{target}.tmp-{os.getpid()}"
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, target)
+    else:
+        np.savez_compressed(target, **arrays)
+
+
+def load_snapshot(source):
+    """Lit un instantané (chemin, flux ou octets) ; retourne ``(meta, {nom: DataFrame})``."""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    with np.load(source, allow_pickle=False) as data:
+        meta = json.loads(data['meta'].item())
+        if meta.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Version d'instantané non prise en charge : {meta.get('version')}")
+        tables = {}
+        for name, columns in meta['tables'].items():
+            frame = {col: _decode_column(data, f"{name}.{i}") for i, col in enumerate(columns)}
+            tables[name] = pd.DataFrame(frame, columns=columns)
+    return meta, tables
+
+
+@lru_cache(maxsize=4)
+def _load_cached(path, mtime_ns):
+    return load_snapshot(path)
+
+
+def load_snapshot_file(path):
+    """Instantané lu depuis ``path``, partagé entre sessions tant que le fichier ne change pas.
+
+    Les DataFrames retournés sont partagés et ne doivent pas être modifiés.
+    """
+    return _load_cached(os.path.abspath(path), os.stat(path).st_mtime_ns)
@@ -0,0 +1,56 @@
+# test_rolling_stats.py
+"""Tests des statistiques glissantes : mise à jour incrémentale contre recalcul complet.
+
+    python -m unittest test_rolling_stats
+"""
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from currencies import load_registry
+from rolling_stats import RollingStatistics, cached_statistics
+
+
+def price_history(n_dates=400, n_pairs=3, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2024-01-01', periods=n_dates).to_numpy()
+    prix = 1.1 * np.exp(np.cumsum(rng.normal(0, 0.006, (n_dates, n_pairs)), axis=0))
+    return dates, prix
+
+
+class RollingStatisticsTest(unittest.TestCase):
+    def assertSameStatistics(self, actual, expected):
+        np.testing.assert_allclose(actual.to_numpy(), expected.to_numpy(), rtol=1e-9, atol=1e-9, equal_nan=True)
+
+    def test_extend_matches_full_recompute(self):
+        dates, prix = price_history()
+        pip_size = np.full(prix.shape[1], 0.0001)
+        expected = RollingStatistics(dates, prix, pip_size).latest()
+        # Historiques de départ plus courts que chacune des fenêtres
+        for start in (1, 10, 30, 100, 260):
+            with self.subTest(start=start):
+                stats = RollingStatistics(dates[:start], prix[:start], pip_size)
+                stats.extend(dates, prix)
+                self.assertSameStatistics(stats.latest(), expected)
+
+    def test_matches_pandas_rolling(self):
+        dates, prix = price_history()
+        stats = RollingStatistics(dates, prix, np.full(prix.shape[1], 0.0001)).latest()
+        returns = pd.DataFrame(np.log(prix)).diff()
+        np.testing.assert_allclose(stats['vol_20'], returns.rolling(20).std().iloc[-1] * 100)
+        np.testing.assert_allclose(stats['vol_250'], returns.rolling(250).std().iloc[-1] * 100)
+
+    def test_cached_statistics_recompute_revised_last_bar(self):
+        registry = load_registry()
+        dates, prix = price_history(n_pairs=len(registry))
+        cached_statistics(('test', 'revision'), lambda: (dates[:-1], prix[:-1]), registry, version=1)
+        revised = prix.copy()
+        revised[-2] *= 1.05
+        actual = cached_statistics(('test', 'revision'), lambda: (dates, revised), registry, version=2)
+        expected = RollingStatistics(dates, revised, registry.pip_size).latest()
+        self.assertSameStatistics(actual, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
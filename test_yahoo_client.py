@@ -0,0 +1,121 @@
+# test_yahoo_client.py
+"""Tests du client Yahoo et des primitives de throttling.py contre un serveur HTTP local.
+
+    python -m unittest test_yahoo_client
+"""
+import json
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from throttling import Refresher, TokenBucket
+from yahoo_client import YahooClient
+
+
+def chart_body(ticker, price=1.1):
+    return {'chart': {'result': [{'meta': {'symbol': ticker, 'regularMarketPrice': price,
+                                           'chartPreviousClose': price}}], 'error': None}}
+
+
+class StubServer:
+    """Serveur HTTP local : rejoue des réponses ``(statut, en-têtes)`` scriptées puis répond 200."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.script = []
+        self.hits = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub._lock:
+                    stub.hits.append(self.path)
+                    status, headers = stub.script.pop(0) if stub.script else (200, {})
+                time.sleep(stub.delay)
+                body = json.dumps(chart_body(self.path.split('/')[-1].split('?')[0])).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class YahooClientTest(unittest.TestCase):
+    def setUp(self):
+        self.stub = StubServer()
+        self.addCleanup(self.stub.stop)
+
+    def test_retry_after_429(self):
+        self.stub.script.append((429, {'Retry-After': '1'}))
+        client = YahooClient(self.stub.url, rate=100, burst=100, backoff=0.01)
+        started = time.monotonic()
+        result = client.chart('EURUSD=X', '1d', '1d')
+        self.assertGreaterEqual(time.monotonic() - started, 0.9)
+        self.assertEqual(result['meta']['regularMarketPrice'], 1.1)
+        self.assertEqual(len(self.stub.hits), 2)
+
+    def test_concurrent_identical_calls_are_coalesced(self):
+        self.stub.delay = 0.3
+        client = YahooClient(self.stub.url, rate=100, burst=100, pool_size=20)
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            results = list(executor.map(lambda _: client.chart('EURUSD=X', '1d', '1d'), range(20)))
+        self.assertEqual(len(self.stub.hits), 1)
+        self.assertTrue(all(r['meta']['symbol'] == 'EURUSD=X' for r in results))
+
+
+class ThrottlingTest(unittest.TestCase):
+    def test_token_bucket_pacing(self):
+        bucket = TokenBucket(rate=20, capacity=1)
+        started = time.monotonic()
+        for _ in range(11):
+            bucket.acquire()
+        # Un jeton initial puis 10 jetons à 20 par seconde
+        self.assertGreaterEqual(time.monotonic() - started, 0.45)
+        self.assertLess(time.monotonic() - started, 1.5)
+
+    def test_refresher_shares_concurrent_forced_refreshes(self):
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.2)
+            return len(calls)
+
+        refresher = Refresher(fetch, min_interval=0.05)
+        self.assertEqual(refresher.get()[0], 1)
+        time.sleep(0.1)
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            values = list(executor.map(lambda _: refresher.get(force=True)[0], range(10)))
+        self.assertEqual(values, [2] * 10)
+        self.assertEqual(len(calls), 2)
+
+    def test_refresher_expires_after_max_age(self):
+        calls = []
+        refresher = Refresher(lambda: calls.append(1) or len(calls), min_interval=60, max_age=0.05)
+        self.assertEqual(refresher.get()[0], 1)
+        self.assertEqual(refresher.get()[0], 1)
+        # Un rafraîchissement forcé reste limité par l'intervalle minimal
+        self.assertEqual(refresher.get(force=True)[0], 1)
+        time.sleep(0.1)
+        self.assertEqual(refresher.get()[0], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+# throttling.py
+"""Primitives de limitation de débit, de coalescence des appels et de rafraîchissement partagé."""
+import threading
+import time
+from datetime import datetime
+
+
+class TokenBucket:
+    """Limiteur de débit à seau de jetons, partagé entre threads.
+
+    ``rate`` jetons sont ajoutés par seconde, jusqu'à ``capacity`` (rafale maximale).
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1.0):
+        """Bloque jusqu'à ce que ``tokens`` jetons soient disponibles puis les consomme."""
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Exécute une seule fois les appels identiques simultanés.
+
+    Les appelants qui demandent une clé déjà en cours attendent le résultat
+    (ou l'exception) de l'appel en vol au lieu d'en lancer un nouveau.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class Refresher:
+    """Donnée partagée, rafraîchie au plus une fois par ``min_interval`` secondes.
+
+    ``get(force=True)`` ne relance ``fetch`` que si la valeur en cache est plus
+    ancienne que ``min_interval`` ; sans ``force``, la valeur est rafraîchie
+    lorsqu'elle dépasse ``max_age`` secondes (None = jamais). Les
+    rafraîchissements simultanés attendent le même appel en cours et
+    partagent son résultat.
+    """
+
+    def __init__(self, fetch, min_interval, max_age=None):
+        self.fetch = fetch
+        self.min_interval = min_interval
+        self.max_age = max_age
+        self._flight = SingleFlight()
+        self._entry = None  # (instant monotone, valeur, horodatage)
+
+    def _fresh(self, entry, force):
+        if entry is None:
+            return False
+        limit = self.min_interval if force else self.max_age
+        return limit is None or time.monotonic() - entry[0] < limit
+
+    def _refresh(self, force):
+        # Un autre appel a pu terminer le rafraîchissement pendant notre attente
+        if self._fresh(self._entry, force):
+            return self._entry
+        value = self.fetch()
+        self._entry = (time.monotonic(), value, datetime.now())
+        return self._entry
+
+    def get(self, force=False):
+        """Retourne ``(valeur, horodatage du dernier rafraîchissement)``."""
+        entry = self._entry
+        if not self._fresh(entry, force):
+            entry = self._flight.do('refresh', lambda: self._refresh(force))
+        return entry[1], entry[2]
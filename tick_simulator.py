@@ -0,0 +1,264 @@
+# tick_simulator.py
+"""Simulateur de ticks corrélés multi-paires (bid/ask), générés par lots vectorisés.
+
+Chaque pas de simulation produit une cotation par paire. Les rendements
+logarithmiques suivent une loi normale multivariée dont la covariance vient soit
+de la volatilité journalière des paires (corrélations déduites des devises
+communes), soit de l'historique. Le bid et l'ask encadrent le prix moyen d'un
+écart de ``spread`` pips.
+
+Générateur de charge autonome :
+
+    python tick_simulator.py --rate 10000 --duration 30 --output ticks.parquet
+"""
+import argparse
+import sys
+import threading
+import time
+
+import numpy as np
+
+SECONDES_PAR_JOUR = 86400.0
+
+
+def correlation_from_legs(registry, idiosyncratic=0.1):
+    """Corrélations entre paires déduites de leurs devises de base et de cotation.
+
+    Chaque devise reçoit un choc indépendant et le rendement d'une paire vaut
+    ``choc(base) - choc(quote)`` plus un bruit propre : les paires partageant
+    une devise sont corrélées et la matrice est toujours définie positive.
+    """
+    n_pairs = len(registry)
+    legs = np.zeros((n_pairs, len(registry.devises)))
+    legs[np.arange(n_pairs), registry.base_id] = 1.0
+    legs[np.arange(n_pairs), registry.quote_id] -= 1.0
+    cov = legs @ legs.T + idiosyncratic * np.eye(n_pairs)
+    std = np.sqrt(np.diag(cov))
+    return cov / np.outer(std, std)
+
+
+def covariance_from_history(prix):
+    """Covariance journalière des rendements logarithmiques d'une matrice de prix.
+
+    Une paire sans aucun prix (colonne NaN) reçoit une variance nulle.
+    """
+    returns = np.diff(np.log(prix), axis=0)
+    present = np.isfinite(returns).any(axis=0)
+    returns = returns[:, present]
+    returns = returns[np.isfinite(returns).all(axis=1)]
+    cov = np.zeros((prix.shape[1], prix.shape[1]))
+    cov[np.ix_(present, present)] = np.atleast_2d(np.cov(returns, rowvar=False))
+    return cov
+
+
+_covariances = {}
+_covariances_lock = threading.Lock()
+
+
+def cached_covariance(key, load, version=None):
+    """Covariance de l'historique ``key``, partagée par les sessions du processus.
+
+    ``load()`` retourne la matrice de prix ; il n'est appelé que si la
+    covariance n'est pas en cache ou si ``version`` a changé.
+    """
+    with _covariances_lock:
+        entry = _covariances.get(key)
+        if entry is None or entry[0] != version:
+            entry = _covariances[key] = (version, covariance_from_history(load()))
+        return entry[1]
+
+
+class TickSimulator:
+    """Marche aléatoire corrélée des prix moyens, un pas de ``step_seconds`` à la fois."""
+
+    def __init__(self, prix, daily_cov, spread_pips, pip_size, step_seconds=1.0, start=None, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.log_mid = np.log(np.asarray(prix, dtype=np.float64))
+        self.n_pairs = self.log_mid.shape[0]
+        self.half_spread = np.asarray(spread_pips, dtype=np.float64) * np.asarray(pip_size, dtype=np.float64) / 2
+        self.step_seconds = step_seconds
+        self.step_ns = int(step_seconds * 1e9)
+        self.clock_ns = int((start if start is not None else time.time()) * 1e9)
+
+        cov = np.asarray(daily_cov, dtype=np.float64) * (step_seconds / SECONDES_PAR_JOUR)
+        # Décomposition robuste (la covariance estimée peut être semi-définie)
+        eigval, eigvec = np.linalg.eigh(cov)
+        self.factor = eigvec * np.sqrt(np.clip(eigval, 0, None))
+        self.drift = -0.5 * np.diag(cov)
+
+    @classmethod
+    def from_registry(cls, registry, prix, spread_pips, **kwargs):
+        """Simulateur dont la covariance vient de la volatilité journalière (%) du registre."""
+        vol = registry.volatilite / 100
+        cov = correlation_from_legs(registry) * np.outer(vol, vol)
+        return cls(prix, cov, spread_pips, registry.pip_size, **kwargs)
+
+    @classmethod
+    def from_history(cls, registry, history_prix, spread_pips, **kwargs):
+        """Simulateur dont la covariance est estimée sur une matrice de prix journaliers."""
+        return cls(history_prix[-1], covariance_from_history(history_prix), spread_pips, registry.pip_size, **kwargs)
+
+    @property
+    def mid(self):
+        return np.exp(self.log_mid)
+
+    def next_batch(self, n_steps):
+        """Avance de ``n_steps`` pas et retourne les ``n_steps * n_paires`` ticks générés.
+
+        Les tableaux sont ordonnés par pas puis par identifiant de paire.
+        """
+        shocks = self.rng.standard_normal((n_steps, self.n_pairs)) @ self.factor.T + self.drift
+        log_mid = self.log_mid + np.cumsum(shocks, axis=0)
+        self.log_mid = log_mid[-1].copy()
+
+        mid = np.exp(log_mid)
+        timestamps = self.clock_ns + self.step_ns * np.arange(1, n_steps + 1, dtype=np.int64)
+        self.clock_ns = int(timestamps[-1])
+        return {
+            'timestamp': np.repeat(timestamps, self.n_pairs),
+            'pair_id': np.tile(np.arange(self.n_pairs, dtype=np.int32), n_steps),
+            'mid': mid.ravel(),
+            'bid': (mid - self.half_spread).ravel(),
+            'ask': (mid + self.half_spread).ravel(),
+        }
+
+
+class TickFeed:
+    """Fait tourner un simulateur en continu à ``rate`` ticks/seconde dans un thread.
+
+    Les ticks sont produits par lots toutes les ``batch_interval`` secondes ; la
+    dernière cotation de chaque paire est disponible via ``latest()`` et chaque
+    lot est transmis à ``sink`` s'il est fourni.
+    """
+
+    def __init__(self, simulator, rate, batch_interval=0.05, sink=None):
+        self.simulator = simulator
+        self.rate = rate
+        self.batch_interval = batch_interval
+        self.sink = sink
+        self.ticks = 0
+        self._latest = self._snapshot()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _snapshot(self):
+        mid = self.simulator.mid
+        half_spread = self.simulator.half_spread
+        return {'mid': mid, 'bid': mid - half_spread, 'ask': mid + half_spread,
+                'timestamp': self.simulator.clock_ns}
+
+    def latest(self):
+        """Dernière cotation de chaque paire (tableaux indexés par identifiant)."""
+        return self._latest
+
+    def _run(self):
+        n_pairs = self.simulator.n_pairs
+        next_batch = time.monotonic()
+        owed = 0.0
+        while not self._stop.is_set():
+            owed += self.rate * self.batch_interval
+            n_steps = int(owed // n_pairs)
+            if n_steps:
+                owed -= n_steps * n_pairs
+                batch = self.simulator.next_batch(n_steps)
+                self._latest = self._snapshot()
+                self.ticks += n_steps * n_pairs
+                if self.sink is not None:
+                    self.sink(batch)
+            next_batch += self.batch_interval
+            self._stop.wait(max(0.0, next_batch - time.monotonic()))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='tick-feed', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+_shared_feeds = {}
+_shared_lock = threading.Lock()
+
+
+def shared_feed(registry, rate, prix=None, spread_pips=1.0):
+    """Flux continu unique par processus pour un registre et un débit donnés.
+
+    ``prix`` et ``spread_pips`` ne servent qu'au démarrage du flux.
+    """
+    key = (id(registry), rate)
+    with _shared_lock:
+        feed = _shared_feeds.get(key)
+        if feed is None:
+            simulator = TickSimulator.from_registry(
+                registry, registry.prix_base if prix is None else prix,
+                np.broadcast_to(spread_pips, len(registry)),
+                step_seconds=len(registry) / rate,
+            )
+            feed = _shared_feeds[key] = TickFeed(simulator, rate).start()
+        return feed
+
+
+class _TickWriter:
+    """Écrit les lots de ticks en CSV ou Parquet."""
+
+    def __init__(self, path, symboles):
+        self.path = path
+        self.symboles = np.array(symboles, dtype=object)
+        self.writer = None
+        self.rows = 0
+
+    def __call__(self, batch):
+        import pandas as pd
+        df = pd.DataFrame(batch)
+        df['symbole'] = self.symboles[df['pair_id'].to_numpy()]
+        if self.path.endswith('.parquet'):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.path, table.schema)
+            self.writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode='w' if self.rows == 0 else 'a', header=self.rows == 0, index=False)
+        self.rows += len(df)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def main(argv=None):
+    from currencies import load_registry
+
+    parser = argparse.ArgumentParser(description="Générateur de ticks Forex corrélés")
+    parser.add_argument('--rate', type=float, default=1000.0, help="Ticks par seconde")
+    parser.add_argument('--duration', type=float, default=10.0, help="Durée en secondes")
+    parser.add_argument('--output', help="Fichier de ticks (.csv ou .parquet) ; aucun par défaut")
+    parser.add_argument('--currencies', help="Configuration des paires (JSON), par défaut currencies.json")
+    parser.add_argument('--spread', type=float, default=1.0, help="Écart bid/ask en pips")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    registry = load_registry(args.currencies)
+    simulator = TickSimulator.from_registry(
+        registry, registry.prix_base, np.full(len(registry), args.spread),
+        step_seconds=len(registry) / args.rate, seed=args.seed,
+    )
+    writer = _TickWriter(args.output, registry.symboles) if args.output else None
+    feed = TickFeed(simulator, args.rate, sink=writer).start()
+    started = time.monotonic()
+    try:
+        time.sleep(args.duration)
+    finally:
+        feed.stop()
+        if writer is not None:
+            writer.close()
+    elapsed = time.monotonic() - started
+    print(f"{feed.ticks} ticks en {elapsed:.1f} s ({feed.ticks / elapsed:.0f} ticks/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
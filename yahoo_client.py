@@ -0,0 +1,183 @@
+# yahoo_client.py
+"""Client HTTP Yahoo Finance : session poolée, limitation de débit, reprises et coalescence.
+
+Un client unique par processus (``get_client``) est partagé par toutes les
+sessions Streamlit. L'URL de base est configurable (``YAHOO_BASE_URL``) pour
+pouvoir le tester contre un serveur HTTP local.
+"""
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from throttling import SingleFlight, TokenBucket
+
+DEFAULT_BASE_URL = 'https://query1.finance.yahoo.com'
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# Données intraday : (fenêtre maximale par requête, profondeur maximale) en jours
+INTRADAY_LIMITS = {
+    '1m': (7, 30),
+    '2m': (60, 60),
+    '5m': (60, 60),
+    '15m': (60, 60),
+    '30m': (60, 60),
+    '60m': (730, 730),
+    '1h': (730, 730),
+}
+
+
+class YahooFetchError(Exception):
+    """Échec d'une requête Yahoo Finance après épuisement des reprises."""
+
+
+class YahooClient:
+    def __init__(self, base_url=DEFAULT_BASE_URL, rate=2.0, burst=5, max_retries=4,
+                 backoff=0.5, max_backoff=30.0, timeout=10.0, pool_size=10):
+        self.base_url = base_url.rstrip('/')
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.limiter = TokenBucket(rate, burst)
+        self.single_flight = SingleFlight()
+        self.pool_size = pool_size
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['User-Agent'] = USER_AGENT
+
+    def _sleep_before_retry(self, attempt, retry_after=None):
+        """Attente exponentielle avec gigue complète (ou ``Retry-After`` si fourni)."""
+        if retry_after is not None:
+            delay = min(self.max_backoff, retry_after)
+        else:
+            delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        time.sleep(delay)
+
+    def _request(self, path, params):
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            retry_after = None
+            try:
+                response = self.session.get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
+            except requests.RequestException as e:
+                last_error = e
+            else:
+                if response.status_code == 200:
+                    return response.json()
+                last_error = YahooFetchError(f"HTTP {response.status_code} pour {path}")
+                if response.status_code not in RETRY_STATUS:
+                    raise last_error
+                header = response.headers.get('Retry-After')
+                retry_after = float(header) if header and header.isdigit() else None
+            if attempt < self.max_retries:
+                self._sleep_before_retry(attempt, retry_after)
+        raise YahooFetchError(f"Échec de la requête {path} après {self.max_retries + 1} tentatives: {last_error}")
+
+    def get_json(self, path, params=None):
+        """GET JSON ; les requêtes identiques en vol simultanément sont coalescées."""
+        params = dict(params or {})
+        key = (path, tuple(sorted(params.items())))
+        return self.single_flight.do(key, lambda: self._request(path, params))
+
+    def chart(self, ticker, period='2y', interval='1d'):
+        """Résultat brut de l'API ``chart`` pour un ticker."""
+        return self._chart(ticker, {'range': period, 'interval': interval})
+
+    def _chart(self, ticker, params):
+        data = self.get_json(f"/v8/finance/chart/{ticker}", params)
+        chart = data.get('chart') or {}
+        if chart.get('error') or not chart.get('result'):
+            raise YahooFetchError(f"Réponse invalide pour {ticker}: {chart.get('error')}")
+        return chart['result'][0]
+
+    def _map(self, fn, tickers):
+        with ThreadPoolExecutor(max_workers=min(self.pool_size, max(1, len(tickers)))) as executor:
+            return list(executor.map(fn, tickers))
+
+    def history(self, tickers, period='2y', interval='1d'):
+        """Clôtures historiques, une colonne par ticker (équivalent de ``yf.download(...)['Close']``)."""
+        def fetch(ticker):
+            result = self.chart(ticker, period, interval)
+            dates = pd.to_datetime(result.get('timestamp', []), unit='s')
+            if interval.endswith(('d', 'wk', 'mo')):
+                dates = dates.normalize()
+            quote = result.get('indicators', {}).get('quote', [{}])[0]
+            close = pd.Series(quote.get('close', []), index=dates, name=ticker, dtype='float64')
+            return close[~close.index.duplicated(keep='last')]
+
+        columns = self._map(fetch, list(tickers))
+        hist_data = pd.concat(columns, axis=1) if columns else pd.DataFrame()
+        hist_data.index.name = 'Date'
+        return hist_data.sort_index()
+
+    def history_range(self, tickers, start, end, interval='5m', window_days=None):
+        """Clôtures entre ``start`` et ``end`` (secondes epoch), fenêtre par fenêtre.
+
+        La période est découpée selon la fenêtre maximale autorisée pour
+        ``interval`` ; toutes les fenêtres de tous les tickers sont téléchargées
+        en parallèle puis recollées. Retourne ``{ticker: (timestamps, close)}``
+        avec des timestamps epoch int64 en nanosecondes, triés et sans doublon,
+        et des clôtures float32.
+        """
+        if window_days is None:
+            window_days = INTRADAY_LIMITS.get(interval, (365, None))[0]
+        step = int(window_days * 86400)
+        bounds = list(range(int(start), int(end), step))
+        tasks = [(ticker, lo, min(lo + step, int(end))) for ticker in tickers for lo in bounds]
+
+        def fetch(task):
+            ticker, lo, hi = task
+            result = self._chart(ticker, {'period1': lo, 'period2': hi, 'interval': interval})
+            timestamps = np.asarray(result.get('timestamp') or [], dtype=np.int64)
+            quote = result.get('indicators', {}).get('quote', [{}])[0]
+            close = np.asarray(quote.get('close') or [], dtype=np.float64)
+            return ticker, timestamps, close
+
+        chunks = {ticker: [] for ticker in tickers}
+        for ticker, timestamps, close in self._map(fetch, tasks):
+            chunks[ticker].append((timestamps, close))
+
+        series = {}
+        for ticker, parts in chunks.items():
+            timestamps = np.concatenate([p[0] for p in parts]) if parts else np.empty(0, dtype=np.int64)
+            close = np.concatenate([p[1] for p in parts]) if parts else np.empty(0)
+            keep = np.isfinite(close)
+            timestamps, close = timestamps[keep], close[keep]
+            order = np.argsort(timestamps, kind='stable')
+            timestamps, close = timestamps[order], close[order]
+            # Les fenêtres se chevauchent à leurs bornes : garder la dernière valeur
+            last = np.append(timestamps[1:] != timestamps[:-1], True) if timestamps.size else np.empty(0, dtype=bool)
+            series[ticker] = (timestamps[last] * 1_000_000_000, close[last].astype(np.float32))
+        return series
+
+    def quotes(self, tickers):
+        """Cours actuel et clôture précédente de chaque ticker."""
+        def fetch(ticker):
+            meta = self.chart(ticker, '1d', '1d').get('meta', {})
+            return ticker, {
+                'regularMarketPrice': meta.get('regularMarketPrice'),
+                'previousClose': meta.get('previousClose') or meta.get('chartPreviousClose'),
+            }
+
+        return dict(self._map(fetch, list(tickers)))
+
+
+@lru_cache(maxsize=None)
+def get_client():
+    """Client partagé par toutes les sessions du processus."""
+    return YahooClient(
+        base_url=os.environ.get('YAHOO_BASE_URL', DEFAULT_BASE_URL),
+        rate=float(os.environ.get('YAHOO_RATE_LIMIT', 2.0)),
+    )